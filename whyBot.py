@@ -18,6 +18,16 @@ import traceback
 import sys
 import collections
 import os
+import weakref
+import struct
+import mmap
+import array
+import atexit
+import bisect
+import time
+import select
+import signal
+import threading
 
 thePathOfThisFile = os.path.abspath(os.path.join(os.getcwd(), sys.argv[0]))
 
@@ -28,6 +38,13 @@ thePathOfThisFile = os.path.abspath(os.path.join(os.getcwd(), sys.argv[0]))
 class ExternalStackInfo(object):
   def __init__(self):
     self.ignoredLineNumbers = set()
+    self.relevantLineNumbers_byCallSite = {} #Map<(code id, instruction index), line number or None if ignored>
+    self.codesById = {} #keeps each cached code object alive so that its id can't be reused by another one
+    self.enabled = True
+
+  def setEnabled(self, enabled):
+    #When disabled, no stack walks happen and every line number is recorded as None (see Program.run)
+    self.enabled = enabled
 
   def ignoreCurrentlyActiveLines(self):
     #make a note of the current stack to enable ignoring any lines currently active (which just participate in this custom interpreter and aren't part of the program being defined)
@@ -43,15 +60,35 @@ class ExternalStackInfo(object):
   def ignoreLineNumber(self, lineNumber):
     if lineNumber not in self.ignoredLineNumbers:
       self.ignoredLineNumbers.add(lineNumber)
+      #any call site that we already resolved might be on this line
+      self.relevantLineNumbers_byCallSite.clear()
+
+  def getRelevantLineNumber(self, frame):
+    #Return the line currently executing in this frame, or None if that line is ignored
+    #The answer for each call site (code and instruction index) is remembered until the set of ignored lines changes
+    #(call sites are keyed by the id of the code because hashing a code object is slow)
+    callSite = (id(frame.f_code), frame.f_lasti)
+    try:
+      return self.relevantLineNumbers_byCallSite[callSite]
+    except KeyError:
+      pass
+    lineNumber = frame.f_lineno
+    if lineNumber in self.ignoredLineNumbers:
+      lineNumber = None
+    self.codesById[callSite[0]] = frame.f_code
+    self.relevantLineNumbers_byCallSite[callSite] = lineNumber
+    return lineNumber
     
   def get_root_relevantLineNumber(self):
     #Return the line in the call stack closest to the root, excluding ignored lines
     #Generally only relevant if statements are being added to the Program
+    if not self.enabled:
+      return None
     lineNumber = None
-    frame = inspect.currentframe()
+    frame = inspect.currentframe().f_back
     while frame is not None:
-      currentLineNumber = frame.f_lineno
-      if currentLineNumber not in self.ignoredLineNumbers:
+      currentLineNumber = self.getRelevantLineNumber(frame)
+      if currentLineNumber is not None:
         lineNumber = currentLineNumber
       frame = frame.f_back
     if lineNumber is None:
@@ -61,10 +98,18 @@ class ExternalStackInfo(object):
   def get_leaf_relevantLineNumber(self):
     #Return the number of the line closest to the leaf, excluding ignored lines
     #Generally relevant while the Program is executing
-    frame = inspect.currentframe()
+    #This runs for every Justification, so the cache lookup from getRelevantLineNumber is inlined here
+    if not self.enabled:
+      return None
+    relevantLineNumbers_byCallSite = self.relevantLineNumbers_byCallSite
+    frame = inspect.currentframe().f_back
     while frame is not None:
-      lineNumber = frame.f_lineno
-      if lineNumber not in self.ignoredLineNumbers:
+      callSite = (id(frame.f_code), frame.f_lasti)
+      try:
+        lineNumber = relevantLineNumbers_byCallSite[callSite]
+      except KeyError:
+        lineNumber = self.getRelevantLineNumber(frame)
+      if lineNumber is not None:
         del frame
         return lineNumber
       frame = frame.f_back
@@ -79,21 +124,391 @@ externalStackInfo.ignoreRange(0, externalStackInfo.get_root_relevantLineNumber()
 #############################################################################################################################################################################################
 #miscellaneous utils
 class ShellScript(object):
-  def __init__(self, commandText):
+  defaultMaxNumBytes = 100000 #the most output (and, separately, errors) to keep from one command; beyond this, only the start and the end are kept (see CappedOutput)
+
+  def __init__(self, commandText, coprocess=None, timeout=None, maxNumBytes=None):
     self.commandText = commandText
-    self.returnCode = None
+    self.coprocess = coprocess #a BashCoprocess to run the command in, or None to start a new bash for it
+    self.timeout = timeout #the number of seconds after which the command is stopped, or None to wait for as long as it runs
+    if maxNumBytes is None:
+      maxNumBytes = self.defaultMaxNumBytes
+    self.maxNumBytes = maxNumBytes
+    self.returnCode = None #None if the command was stopped
     self.output = None
+    self.errors = None #what the command wrote to stderr
+    self.outputSize = None #the number of bytes of output, including any that weren't kept
+    self.errorsSize = None
+    self.timedOut = False
+    self.bash = None #the bash running the command, between launch and wait
+    self.deadline = None
+    self.outputStream = None #what has been read from the bash so far, between launch and wait
+    self.errorsStream = None
 
   def process(self):
-    try:
-      self.returnCode = 0
-      self.output = subprocess.check_output(["bash", "-c", self.commandText], stdin=None, stderr=subprocess.PIPE, shell=True)
-    except subprocess.CalledProcessError as e:
-      self.output = e.output
-      self.returnCode = e.returncode
+    if self.coprocess is not None and self.coprocess.run(self):
+      return
+    #otherwise the command gets its own bash
+    self.launch()
+    self.wait()
     #logger.message("output = '" + str(self.output) + "'")
     #logger.message("returnCode = " + str(self.returnCode))
 
+  #starts the command in a new bash without waiting for it to finish (see wait), so that other work can happen while it runs
+  #If a deadline (a time) is given, it replaces the one given by the timeout, for commands that share one deadline (see ProbePool)
+  def launch(self, deadline=None):
+    if deadline is None and self.timeout is not None:
+      deadline = time.time() + self.timeout
+    self.deadline = deadline
+    startProcess = None
+    if deadline is not None:
+      #the command gets its own process group, so that stopping it also stops anything it started
+      startProcess = os.setpgrp
+    #the command is given to bash directly (not through another shell), and doesn't get to read the user's input
+    with open(os.devnull) as devnull:
+      self.bash = subprocess.Popen(["bash", "-c", self.commandText], stdin=devnull, stdout=subprocess.PIPE, stderr=subprocess.PIPE, preexec_fn=startProcess)
+    self.outputStream = CappedOutput(self.maxNumBytes)
+    self.errorsStream = CappedOutput(self.maxNumBytes)
+
+  def wait(self):
+    if self.bash is None:
+      return
+    self.collect(readStreams(self.getStreams(), self.deadline))
+
+  #the pipes of the launched bash and the CappedOutputs that they're read into (see readStreams), so that several commands can be read from at once (see ProbePool)
+  def getStreams(self):
+    return [(self.bash.stdout, self.outputStream), (self.bash.stderr, self.errorsStream)]
+
+  #whether the launched bash has closed both of its pipes
+  def isDoneWriting(self):
+    return self.outputStream.isFinished() and self.errorsStream.isFinished()
+
+  #records what was read from the launched bash, stopping it first if it isn't done
+  def collect(self, finished):
+    if not finished:
+      stopProcessGroup(self.bash)
+    self.bash.stdout.close()
+    self.bash.stderr.close()
+    self.bash.wait()
+    if finished:
+      self.finish(self.outputStream, self.errorsStream, self.bash.returncode)
+    else:
+      self.finish(self.outputStream, self.errorsStream, None)
+    self.bash = None
+
+  #records what was read from the command; a returnCode of None means that the command ran out of time
+  def finish(self, outputStream, errorsStream, returnCode):
+    self.output = outputStream.getText()
+    self.outputSize = outputStream.numBytes
+    self.errors = errorsStream.getText()
+    self.errorsSize = errorsStream.numBytes
+    self.returnCode = returnCode
+    self.timedOut = (returnCode is None)
+
+  def justifyOutput(self, supporters):
+    if self.timedOut:
+      return AndJustification(DeferredText("shell command '%s' was stopped after %s seconds, having given response = '%s'", self.commandText, self.timeout, self.output), supporters)
+    return AndJustification(DeferredText("shell command '%s' gave response = '%s'", self.commandText, self.output), supporters)
+
+  def justifyErrors(self, supporters):
+    return AndJustification(DeferredText("shell command '%s' gave errors = '%s'", self.commandText, self.errors), supporters)
+
+#the text read from a stream, keeping at most maxNumBytes of it; if there is more, only its start and its end are kept
+#If a marker is given, the stream is finished by a line starting with the marker (see BashCoprocess), which isn't part of the text
+class CappedOutput(object):
+  def __init__(self, maxNumBytes, marker=None):
+    self.maxNumBytes = maxNumBytes
+    self.marker = marker
+    self.head = ""
+    self.tail = None #the end of the text, once there is too much to keep all of it
+    self.numBytes = 0
+    self.ended = False #whether the stream was closed
+    self.markerText = None #the rest of the marker line, once it has been read
+    self.markerSize = 0 #the most that the marker line can add to the text
+    if marker is not None:
+      self.markerSize = len(marker) + 16
+
+  def add(self, data):
+    if data == "":
+      self.ended = True
+      return
+    self.numBytes += len(data)
+    if self.tail is not None:
+      self.tail += data
+    else:
+      self.head += data
+    if self.marker is not None:
+      self.findMarker()
+    self.trim()
+
+  def trim(self):
+    maxNumBytes = self.maxNumBytes
+    if self.markerText is None:
+      #the text might end with the marker line, which findMarker removes later, so there is room for it too
+      maxNumBytes += self.markerSize
+    if self.tail is None:
+      if len(self.head) <= maxNumBytes:
+        return
+      headSize = self.maxNumBytes // 2
+      self.tail = self.head[headSize:]
+      self.head = self.head[:headSize]
+    tailSize = maxNumBytes - len(self.head)
+    self.tail = self.tail[max(0, len(self.tail) - tailSize):]
+
+  def findMarker(self):
+    end = self.getEnd(self.markerSize)
+    if not end.endswith("\n"):
+      return
+    markerStart = end.rfind("\n" + self.marker)
+    if markerStart < 0:
+      return
+    self.markerText = end[markerStart + 1 + len(self.marker):-1].strip()
+    #the marker was printed after a newline, in case the text didn't end with one
+    self.removeEnd(len(end) - markerStart)
+
+  def getEnd(self, numBytes):
+    if self.tail is not None and len(self.tail) >= numBytes:
+      return self.tail[-numBytes:]
+    return (self.head + (self.tail or ""))[-numBytes:]
+
+  def removeEnd(self, numBytes):
+    self.numBytes -= numBytes
+    if self.tail is None:
+      self.head = self.head[:len(self.head) - numBytes]
+    else:
+      self.tail = self.tail[:max(0, len(self.tail) - numBytes)]
+
+  def isFinished(self):
+    return self.ended or self.markerText is not None
+
+  def getNumOmittedBytes(self):
+    return self.numBytes - len(self.head) - len(self.tail or "")
+
+  def getText(self):
+    if self.tail is None:
+      return self.head
+    return self.head + "\n...(" + str(self.getNumOmittedBytes()) + " of " + str(self.numBytes) + " bytes omitted)...\n" + self.tail
+
+#reads into each CappedOutput from its file until it is finished, or until the deadline (a time, or None to wait for as long as it takes)
+#Output that was written before the deadline is still read afterward, so a command that finished in time but was waited for late (see ProbePool) isn't counted as too slow
+#If isDone is given, reading also stops as soon as it returns True (see ProbePool.runPass)
+#Returns whether they all finished (or isDone returned True) before the deadline
+def readStreams(filesAndOutputs, deadline, isDone=None):
+  remaining = [(readFile, output) for (readFile, output) in filesAndOutputs if not output.isFinished()]
+  numLateReads = 0
+  while len(remaining) > 0:
+    if isDone is not None and isDone():
+      return True
+    timeout = None
+    if deadline is not None:
+      timeout = max(0, deadline - time.time())
+    readableFiles = select.select([readFile for (readFile, output) in remaining], [], [], timeout)[0]
+    if timeout == 0:
+      #a command that keeps writing could always be readable, so it only gets a few reads after the deadline
+      if len(readableFiles) == 0 or numLateReads >= 16:
+        return False
+      numLateReads += 1
+    for (readFile, output) in remaining:
+      if readFile in readableFiles:
+        output.add(os.read(readFile.fileno(), 65536))
+    remaining = [(readFile, output) for (readFile, output) in remaining if not output.isFinished()]
+  return True
+
+#stops a process that was started in its own process group, along with anything it started
+def stopProcessGroup(process):
+  try:
+    os.killpg(process.pid, signal.SIGKILL)
+  except OSError:
+    pass
+
+#a bash that stays running and runs one command after another, so that each command doesn't have to wait for a new bash to start (see Execution.getBashCoprocess)
+#Each command runs in a subshell, so it can't change the directory or variables seen by the next one, and is followed by a line containing a marker and the command's return code
+class BashCoprocess(object):
+  maxNumFailures = 4 #after bash has unexpectedly stopped this many times, commands go back to each running in a new bash
+
+  def __init__(self):
+    self.process = None
+    self.marker = "__whyBot_done_" + str(os.getpid()) + "_" + str(id(self)) + "__"
+    self.numStarts = 0
+    self.numFailures = 0
+    self.numCommands = 0
+
+  def start(self):
+    self.numStarts += 1
+    try:
+      #bash gets its own process group, so that stopping it also stops any command it is running
+      self.process = subprocess.Popen(["bash", "--noprofile", "--norc"], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, preexec_fn=os.setpgrp)
+    except OSError:
+      self.process = None
+    return self.process is not None
+
+  def stop(self):
+    if self.process is None:
+      return
+    try:
+      self.process.stdin.close()
+    except (IOError, OSError):
+      pass
+    stopProcessGroup(self.process)
+    self.process.stdout.close()
+    self.process.stderr.close()
+    self.process.wait()
+    self.process = None
+
+  def isAlive(self):
+    return self.process is not None and self.process.poll() is None
+
+  #runs the given ShellScript and records its results in it
+  #Returns False if the script should be run in a new bash instead
+  def run(self, script):
+    if not self.isAlive():
+      self.stop()
+      if self.numFailures >= self.maxNumFailures or not self.start():
+        return False
+    deadline = None
+    if script.timeout is not None:
+      deadline = time.time() + script.timeout
+    outputStream = CappedOutput(script.maxNumBytes, self.marker)
+    errorsStream = CappedOutput(script.maxNumBytes, self.marker)
+    try:
+      self.send(script.commandText)
+      finished = readStreams([(self.process.stdout, outputStream), (self.process.stderr, errorsStream)], deadline)
+    except (IOError, OSError):
+      finished = True
+    if not finished:
+      #the command ran out of time, so it is stopped along with this bash, and the next command gets a new bash
+      self.stop()
+      script.finish(outputStream, errorsStream, None)
+      return True
+    if outputStream.markerText is None or errorsStream.markerText is None:
+      #bash stopped (maybe the command stopped it), so the next command gets a new one
+      self.numFailures += 1
+      self.stop()
+      return False
+    self.numCommands += 1
+    script.finish(outputStream, errorsStream, int(outputStream.markerText))
+    return True
+
+  def send(self, commandText):
+    #the command is quoted and given to eval, so that even a command that doesn't parse can't consume the markers
+    quotedCommand = "'" + commandText.replace("'", "'\\''") + "'"
+    self.process.stdin.write("( eval " + quotedCommand + " ) < /dev/null; printf '\\n%s %d\\n' " + self.marker + " $?; printf '\\n%s\\n' " + self.marker + " >&2\n")
+    self.process.stdin.flush()
+
+  def __str__(self):
+    return "bash coprocess: " + str(self.numCommands) + " commands, started " + str(self.numStarts) + " times"
+
+#runs the shell commands (probes) that find the facts declared by Propositions (see Universe in suggestion), at most maxNumRunning at a time, and stops those of each pass that are still running at a shared deadline
+#The commands are run by a background thread, so that nothing waits for them until their results are used (see ProbeResult)
+#Each command runs only once per Execution, and its result is kept for the rest of it, so a fact found by a probe isn't updated when the world changes (the user can still correct it; see FactQuery)
+class ProbePool(object):
+  maxNumRunning = 4
+  timeout = 10 #the number of seconds from the start of a pass after which its probes are stopped
+
+  def __init__(self):
+    self.scripts = {} #Map<command text, ShellScript>
+    self.launchJustifications = {} #Map<command text, the Justification for starting the pass that ran it>
+    self.finishedCommands = set()
+    self.condition = threading.Condition()
+    self.numPasses = 0
+
+  #starts running these commands in the background, except any that were already started
+  def start(self, commandTexts, launchJustification):
+    newCommands = []
+    for commandText in commandTexts:
+      if commandText not in self.scripts and commandText not in newCommands:
+        newCommands.append(commandText)
+    if len(newCommands) == 0:
+      return
+    self.numPasses += 1
+    for commandText in newCommands:
+      self.scripts[commandText] = ShellScript(commandText, None, self.timeout)
+      self.launchJustifications[commandText] = launchJustification
+    thread = threading.Thread(target=self.runPass, args=(newCommands, time.time() + self.timeout))
+    thread.daemon = True
+    thread.start()
+
+  def runPass(self, commandTexts, deadline):
+    pending = collections.deque(commandTexts)
+    running = [] #the ShellScripts that have been launched and not yet collected
+    while len(pending) > 0 or len(running) > 0:
+      while len(pending) > 0 and len(running) < self.maxNumRunning:
+        commandText = pending.popleft()
+        script = self.scripts[commandText]
+        try:
+          script.launch(deadline)
+          running.append(script)
+        except OSError:
+          script.finish(CappedOutput(0), CappedOutput(0), None)
+          self.finishCommand(commandText)
+      if len(running) > 0:
+        #reads from all of the running probes at once, until any of them is done, so that a slow probe doesn't hold up the results of the others or the start of the next ones
+        streams = []
+        for script in running:
+          streams.extend(script.getStreams())
+        beforeDeadline = readStreams(streams, deadline, lambda: any(script.isDoneWriting() for script in running))
+        for script in list(running):
+          if script.isDoneWriting() or not beforeDeadline:
+            script.collect(script.isDoneWriting())
+            running.remove(script)
+            self.finishCommand(script.commandText)
+
+  def finishCommand(self, commandText):
+    with self.condition:
+      self.finishedCommands.add(commandText)
+      self.condition.notify_all()
+
+  #returns the ShellScript of the probe with this command text once it has finished
+  def getScript(self, commandText):
+    with self.condition:
+      while commandText not in self.finishedCommands:
+        #waiting with a timeout lets the user still interrupt
+        self.condition.wait(1)
+    return self.scripts[commandText]
+
+  def __str__(self):
+    return "probe pool: " + str(len(self.finishedCommands)) + " of " + str(len(self.scripts)) + " probes finished, in " + str(self.numPasses) + " passes"
+
+#the outputs of shell commands that were run recently, so that a Shell that is evaluated again can reuse its previous output (see Shell)
+class ShellResultCache(object):
+  def __init__(self):
+    self.results = {} #Map<command text, CachedShellResult>
+    self.numHits = 0
+    self.numMisses = 0
+
+  #returns the CachedShellResult for this command, or None if there isn't one or it is older than maxAge seconds or any of the inputFiles have changed since
+  def get(self, commandText, maxAge, inputFiles):
+    result = self.results.get(commandText)
+    if result is not None:
+      if (maxAge is None or time.time() - result.time <= maxAge) and result.inputStats == getFileStats(inputFiles):
+        self.numHits += 1
+        return result
+      del self.results[commandText]
+    self.numMisses += 1
+    return None
+
+  def put(self, commandText, result):
+    self.results[commandText] = result
+
+class CachedShellResult(object):
+  def __init__(self, output, returnCode, justification, errorsInfo, inputStats):
+    self.output = output
+    self.returnCode = returnCode
+    self.justification = justification #for the run that produced this output
+    self.errorsInfo = errorsInfo #what that run wrote to stderr
+    self.inputStats = inputStats #from getFileStats, taken just before the command ran
+    self.time = time.time()
+
+#the modification time and size of each of these files (or None for a file that doesn't exist), to tell whether any of them have changed
+def getFileStats(paths):
+  stats = []
+  for path in paths:
+    try:
+      fileStat = os.stat(path)
+      stats.append((fileStat.st_mtime, fileStat.st_size))
+    except OSError:
+      stats.append(None)
+  return tuple(stats)
+
 
 def simpleDebug():
   logger.message()
@@ -109,26 +524,52 @@ def simpleDebug():
   while True:
     text = raw_input("id:")
     num = int(text)
-    justification = justificationsById[num]
-    logger.message(justification.explainRecursive(1))
+    justification = justificationStore.get(num)
+    if justification is None:
+      logger.message("Justification #" + str(num) + " has expired")
+      continue
+    logger.explain(justification, 1)
 
 #logs to the screen
 class PrintLogger(object):
-  def __init__(self):
-    return
+  #if linesPerPage is given, explanations pause after each page of that many lines until the user asks for more
+  #if maxNumExplanationLines is given, explanations stop after that many lines
+  def __init__(self, linesPerPage=None, maxNumExplanationLines=None):
+    self.linesPerPage = linesPerPage
+    self.maxNumExplanationLines = maxNumExplanationLines
 
   def message(self, item=""):
     print(str(item))
 
+  #writes the explanation of a justification one line at a time, as Justification.iterateExplanation generates them, rather than assembling it first
+  def explain(self, justification, maxDepth=-1):
+    self.writeExplanationLines(justification.iterateExplanation(maxDepth))
+
+  #writes what a justification influenced (see Justification.iterateImpact), like explain does
+  def explainImpact(self, justification, maxDepth=1):
+    self.writeExplanationLines(justification.iterateImpact(maxDepth))
+
+  def writeExplanationLines(self, lines):
+    numLines = 0
+    for line in lines:
+      if self.maxNumExplanationLines is not None and numLines >= self.maxNumExplanationLines:
+        self.message("(stopped after " + str(numLines) + " lines)")
+        return
+      if self.linesPerPage is not None and numLines > 0 and numLines % self.linesPerPage == 0:
+        if raw_input("(press Enter for more, or type q to stop) ") == "q":
+          return
+      self.message(line)
+      numLines += 1
+
   def fail(self, message, justification=None):
+    justificationStore.flushJournal() #so the journal can be examined even if nobody answers simpleDebug
     self.message()
     self.message("Error summary:")
     self.message(message)
     if justification is not None:
       self.message()
       self.message("Error explanation:")
-      explanation = justification.explainRecursive(2)
-      self.message(explanation)
+      self.explain(justification, 2)
     self.message()
     self.message("Error stacktrace:")
     traceback.print_stack()
@@ -138,6 +579,15 @@ class PrintLogger(object):
 
 logger = PrintLogger()
 
+#logs to a list instead, so that the output of a benchmark's runs doesn't fill the screen and can be compared
+class RecordingLogger(PrintLogger):
+  def __init__(self, linesPerPage=None, maxNumExplanationLines=None):
+    super(RecordingLogger, self).__init__(linesPerPage, maxNumExplanationLines)
+    self.messages = []
+
+  def message(self, item=""):
+    self.messages.append(str(item))
+
 class StringUtils(object):
   def __init__(self):
     return
@@ -172,6 +622,9 @@ class Program(object):
         NativeMethodDefinition("exceptPrefix", ["other"]),
         NativeMethodDefinition("equals", ["other"]),
       ]),
+      NativeClassDefinition("ShellOutput", (lambda why, text, errors: ShellOutputWrapper(why, text, errors)), [
+        NativeMethodDefinition("getErrors", []),
+      ], parentClassName="String"),
       NativeClassDefinition("List", (lambda why: ListWrapper(why)), [
         NativeMethodDefinition("append", ["item"]),
         NativeMethodDefinition("clear", []),
@@ -189,22 +642,32 @@ class Program(object):
       NativeClassDefinition("Bool", (lambda why, value: BoolWrapper(why, value)), [
         NativeMethodDefinition("toString", []),
         NativeMethodDefinition("equals", ["other"]),
-      ]),
+      ], (lambda value: value is True or value is False)),
       NativeClassDefinition("Num", (lambda why, value: NumberWrapper(why, value)), [
         NativeMethodDefinition("toString", []),
         NativeMethodDefinition("nonEmpty", []),
         NativeMethodDefinition("equals", ["other"]),
         NativeMethodDefinition("plus", ["other"]),
-      ]),
+      ], (lambda value: type(value) == int and value >= -5 and value <= 256)),
     ]
     
     
   def put(self, statements):
     self.statements = self.statements + statements
     
-  def run(self):
-    execution = Execution(self)
-    return execution.run()
+  def run(self, provenance=None):
+    #provenance says which justifications to record (see Provenance); None means all of them, and fewer makes the program run faster
+    #If it doesn't record lines, justifications don't record which lines of this file created them (see ExternalStackInfo.setEnabled)
+    #The lines of the program itself were recorded when its statements were created, so they are still known
+    if provenance is None:
+      provenance = fullProvenance
+    wasEnabled = externalStackInfo.enabled
+    externalStackInfo.setEnabled(provenance.recordsLines)
+    try:
+      execution = Execution(self, provenance)
+      return execution.run()
+    finally:
+      externalStackInfo.setEnabled(wasEnabled)
 
 class Scope(object):
   def __init__(self, execution):
@@ -218,6 +681,8 @@ class Scope(object):
       raise Exception("Invalid value stored for variable " + str(key) + "; required JustifiedValue, got " + str(info))
     if key in self.data:
       raise Exception("Variable '" + key + "' already defined in " + str(self))
+    if isinstance(info.value, FunctionDefinition):
+      self.execution.invalidateMethodCaches()
     self.data[key] = info
 
   def findScope(self, key):
@@ -234,7 +699,10 @@ class Scope(object):
     return None
 
   def setInfo(self, key, info):
-    self.findScope(key).data[key] = info
+    scope = self.findScope(key)
+    if isinstance(info.value, FunctionDefinition) or isinstance(scope.data[key].value, FunctionDefinition):
+      self.execution.invalidateMethodCaches()
+    scope.data[key] = info
 
   def getInfo(self, key):
     return self.findScope(key).data[key]
@@ -245,6 +713,20 @@ class Scope(object):
       return None
     return scope.data[key]
 
+  #returns the value of the given variable in the scope that is <depth> parents above this one, or None if that scope doesn't have it (yet)
+  def tryGetInfoAt(self, depth, key):
+    scope = self.getAncestor(depth)
+    if scope is None:
+      return None
+    return scope.data.get(key)
+
+  def getAncestor(self, depth):
+    scope = self
+    while depth > 0 and scope is not None:
+      scope = scope.parent
+      depth -= 1
+    return scope
+
   def getValue(self, key):
     return self.getInfo(key).value
 
@@ -288,7 +770,7 @@ class Scope(object):
       argumentName = f.argumentNames[i]
       child.declareInfo(argumentName, info)
     result = None
-    calledChild_justification = AndJustification("called " + str(f.functionName), [callJustification])
+    calledChild_justification = AndJustification(internText("called " + str(f.functionName)), [callJustification])
     calledChild_justification.logicLocation = f.lineNumber
     #run all the statements in the function
     self.execution.runStatements(f.statements, calledChild_justification)
@@ -306,9 +788,9 @@ class Scope(object):
     else:
       scope = child.tryFindScope("return")
       if scope is None:
-        return JustifiedValue(None, AndJustification(str(f.functionName) + " did not reach any return statement", [calledChild_justification]))
+        return JustifiedValue(None, AndJustification(internText(str(f.functionName) + " did not reach any return statement"), [calledChild_justification]))
       else:
-        return JustifiedValue(None, AndJustification(str(f.functionName) + " explicitly returned None", [calledChild_justification]))
+        return JustifiedValue(None, AndJustification(internText(str(f.functionName) + " explicitly returned None"), [calledChild_justification]))
 
 
 
@@ -334,11 +816,12 @@ class Scope(object):
     classDefinition = classInfo.value
 
     parentClassName = classDefinition.parentClassName
-    newObject = classDefinition.newInstance(self, justifiedArguments, callJustification)
+    newObject = self.execution.tryGetInternedObject(classDefinition, justifiedArguments)
+    if newObject is None:
+      newObject = classDefinition.newInstance(self, justifiedArguments, callJustification)
+      newObject.description = className + "@" + str(newObject.objectId)
 
-    newObject.description = className + "@" + str(newObject.objectId)
-
-    justification = AndJustification("newObject " + str(className) + "(" + ", ".join([str(info.value) for info in justifiedArguments]) + ")",  [callJustification] + [info.justification for info in justifiedArguments])
+    justification = AndJustification(DeferredText("newObject %s(%s)", className, JoinedText(", ", justifiedArguments)),  [callJustification] + [info.justification for info in justifiedArguments])
     return JustifiedValue(newObject, justification)
 
   def newBoringObject(self, className, justifiedArguments, callJustification):
@@ -360,7 +843,7 @@ class Scope(object):
     if initInfo is not None:
       #after having used the scope of the class to find the function, now use the execution scope to actually call that function
       executionScope = self
-      executionScope.callFunction(initInfo.value, [JustifiedValue(newObject, TextJustification("my program specified a " + str(classDefinition.className)))] + justifiedArguments, callJustification)
+      executionScope.callFunction(initInfo.value, [JustifiedValue(newObject, TextJustification(internText("my program specified a " + str(classDefinition.className))))] + justifiedArguments, callJustification)
     else:
       if len(justifiedArguments) != 0:
         logger.fail("Incorrect number of arguments; required 0, received " + str(justifiedArguments), callJustification)
@@ -375,6 +858,13 @@ class Scope(object):
     newObject.execution = self.execution
     return newObject
 
+  #makes an already-constructed native object into an instance of the given native class, like newNativeObject does for the objects it constructs
+  def attachNativeObject(self, className, nativeObject):
+    classDefinition = self.getInfo(className).value
+    self.attachClassDefinition(nativeObject, classDefinition)
+    nativeObject.execution = self.execution
+    nativeObject.description = className + "@" + str(nativeObject.objectId)
+
   def attachClassDefinition(self, newObject, classDefinition):
     newObject.declareInfo("__class__", JustifiedValue(classDefinition, TextJustification("This is the class of the object")))
     
@@ -408,31 +898,65 @@ class Object(Scope):
     classDefinitionImplScope = classDefinition.implementedInScope
     return classDefinitionImplScope.callFunctionName(methodName, [JustifiedValue(self, UnknownJustification())] + justifiedValues, callJustification)
 
+#the names that a scope will declare, known before the program runs
+#Statements resolve each variable they use to the number of scopes to go up to reach the scope declaring it (see LogicStatement.resolve)
+class StaticScope(object):
+  def __init__(self, parent, names):
+    self.parent = parent
+    self.names = set(names)
+
+  #returns how many parents above this scope the nearest scope declaring this name is, or None if no enclosing scope declares it
+  def findDepth(self, name):
+    depth = 0
+    scope = self
+    while scope is not None:
+      if name in scope.names:
+        return depth
+      scope = scope.parent
+      depth += 1
+    return None
+
 #stores runtime information relating to running a program
 class Execution(object):
-  def __init__(self, program):
+  internsValues = True #whether to share one object for each Bool and small Num (see tryGetInternedObject); can be turned off to compare
+  usesBashCoprocess = True #whether Shell commands all run in one long-lived bash (see BashCoprocess) instead of each starting a new one; can be turned off to compare
+
+  def __init__(self, program, provenance=None):
     self.program = program
+    if provenance is None:
+      provenance = fullProvenance
+    self.provenance = provenance
     self.rootScope = Scope(self)
     self.rootScope.description = "global scope"
     self.scopes = [self.rootScope]
     self.classScope = None
     self.statements = [statement for statement in program.statements]
-    self.declareNativeClasses(program.nativeClasses)
     self.callStack = [None]
+    self.methodCacheVersion = 0 #changes whenever a function is declared or replaced, which makes every MethodCache forget its methods
+    self.callSites = [] #the DotCallImpls belonging to this Execution, to report on their MethodCaches
+    self.internedObjects = {} #Map<(class name, value), the NativeObject shared by every such value>
+    self.shellResults = ShellResultCache() #outputs of Shell commands that can be reused
+    self.bashCoprocess = None #made by getBashCoprocess
+    self.probePool = None #made by getProbePool
+    self.recentlyShownIds = collections.deque(maxlen=100) #ids of the justifications most recently shown to the user, who might ask about them (see JustificationCollector)
+    self.justificationCollector = None #made by getJustificationCollector
+    self.rootStaticScope = StaticScope(None, self.getDeclaredNames(self.statements))
+    self.declareNativeClasses(program.nativeClasses)
+    self.bindStatements(self.statements)
+    self.resolveStatements(self.statements, self.rootStaticScope)
 
   def run(self):
-    return self.runStatements(self.statements)
+    return provenanceSampler.run(self.provenance, self, lambda: self.runStatements(self.statements))
 
   def runStatements(self, statements, callJustification=None):
+    #the statements were already bound to this Execution by bindStatements
     result = None
-    for statement in statements:
-      self.ownStatement(statement)
     self.callStack.append(None)
     for statement in statements:
       if callJustification is not None:
         justification = callJustification
       else:
-        justification = TextJustification(str(statement) + " is in my program")
+        justification = TextJustification(internText(str(statement) + " is in my program"))
       self.callStack[-1] = statement.lineNumber
       result = statement.process(justification)
       if result is not None:
@@ -440,6 +964,33 @@ class Execution(object):
     del self.callStack[-1]
     return result
 
+  def noteShownJustification(self, justification):
+    self.recentlyShownIds.append(justification.justificationId)
+
+  #Returns the BashCoprocess that Shell commands run in, or None if each should start a new bash
+  def getBashCoprocess(self):
+    if not self.usesBashCoprocess:
+      return None
+    if self.bashCoprocess is None:
+      self.bashCoprocess = BashCoprocess()
+    return self.bashCoprocess
+
+  def getProbePool(self):
+    if self.probePool is None:
+      self.probePool = ProbePool()
+    return self.probePool
+
+  def getJustificationCollector(self):
+    if self.justificationCollector is None:
+      self.justificationCollector = JustificationCollector(self)
+    return self.justificationCollector
+
+  #Tells statements which Execution (and which class, if any) they belong to
+  #This happens once, before the statements first run: for the Program when the Execution is created, and for the methods of a class when the class is declared
+  def bindStatements(self, statements):
+    for statement in statements:
+      self.ownStatement(statement)
+
   def ownStatement(self, statement):
     statement.beOwned(self)
     for child in statement.getChildren():
@@ -447,6 +998,19 @@ class Execution(object):
         raise Exception("Invalid child statement " + str(child) + " of class " + str(child.__class__) + " is of invalid class (does not implement beOwned) to be assigned to parent statement " + str(statement) + " at line " + str(statement.lineNumber))
       self.ownStatement(child)
 
+  #Tells statements how many scopes up to find each variable they use
+  #Like bindStatements, this happens once, before the statements first run, and lets Get and Set skip searching through scopes that can't declare their variable
+  def resolveStatements(self, statements, staticScope):
+    for statement in statements:
+      statement.resolve(staticScope)
+
+  #returns the names of the variables that these statements declare directly in the scope they run in
+  def getDeclaredNames(self, statements):
+    names = set()
+    for statement in statements:
+      statement.declareNames(names)
+    return names
+
   def getScope(self):
     return self.scopes[-1]
 
@@ -488,7 +1052,7 @@ class Execution(object):
     implementedInScope = parentImplementationScope.newChild(nativeClassDefinition.managedClassName)
     nativeClassDefinition.implementedInScope = implementedInScope
 
-    foundInScope.declareInfo(managedClassName, JustifiedValue(nativeClassDefinition, TextJustification(str(managedClassName) + " is a built-in class")))
+    foundInScope.declareInfo(managedClassName, JustifiedValue(nativeClassDefinition, TextJustification(internText(str(managedClassName) + " is a built-in class"))))
     for methodDefinition in nativeClassDefinition.methodDefinitions:
       nativeStatement = NativeSelfCall(methodDefinition.methodName, [Get(argumentName) for argumentName in methodDefinition.argumentNames])
       implementedInScope.declareFunction(
@@ -498,9 +1062,10 @@ class Execution(object):
           None,
           [nativeStatement]
         ),
-        TextJustification(str(methodDefinition.methodName) + " is a built-in method")
+        TextJustification(internText(str(methodDefinition.methodName) + " is a built-in method"))
       )
       self.ownStatement(nativeStatement)
+      nativeStatement.resolve(StaticScope(self.rootStaticScope, ["self", "return"] + methodDefinition.argumentNames))
 
 
   def declareClass(self, classDefinition, justification):
@@ -523,10 +1088,46 @@ class Execution(object):
     #make any method definitions
     self.addScope(implementedInScope)
     self.setClassScope(implementedInScope)
+    self.bindStatements(classDefinition.methodDefiners)
     self.runStatements(classDefinition.methodDefiners)
     self.setClassScope(None)
     self.removeScope()
 
+  #Returns the shared object for a value of a class that interns its values (such as Bool and small Num), or None if this value isn't interned
+  #Interned objects are immutable and are created once per Execution, so making a Bool costs a dictionary lookup rather than a new object with its own scope
+  #The justification of each particular value is kept on the JustifiedValue that refers to the shared object
+  def tryGetInternedObject(self, classDefinition, justifiedArguments):
+    if not self.internsValues or classDefinition.canIntern is None or len(justifiedArguments) != 1:
+      return None
+    value = justifiedArguments[0].value
+    if not classDefinition.canIntern(value):
+      return None
+    key = (classDefinition.managedClassName, value)
+    internedObject = self.internedObjects.get(key)
+    if internedObject is None:
+      justification = TextJustification(DeferredText("%s is a built-in %s", value, classDefinition.managedClassName))
+      internedObject = self.rootScope.newNativeObject(classDefinition, [JustifiedValue(value, justification)], justification)
+      internedObject.interned = True
+      internedObject.description = classDefinition.managedClassName + "@" + str(internedObject.objectId)
+      self.internedObjects[key] = internedObject
+    return internedObject
+
+  def invalidateMethodCaches(self):
+    self.methodCacheVersion += 1
+
+  #describes how often each method call found its method in its MethodCache
+  def describeMethodCaches(self, maxNumCallSites=20):
+    callSites = [callSite for callSite in self.callSites if callSite.methodCache.getNumCalls() > 0]
+    callSites.sort(key=lambda callSite: -callSite.methodCache.getNumCalls())
+    numHits = sum([callSite.methodCache.numHits for callSite in callSites])
+    numMisses = sum([callSite.methodCache.numMisses for callSite in callSites])
+    lines = [str(len(callSites)) + " method call sites have run, with " + str(numHits) + " cache hits and " + str(numMisses) + " misses in total"]
+    for callSite in callSites[:maxNumCallSites]:
+      lines.append("[line " + str(callSite.lineNumber) + "] " + str(callSite) + ": " + str(callSite.methodCache))
+    if len(callSites) > maxNumCallSites:
+      lines.append("(" + str(len(callSites) - maxNumCallSites) + " less frequent call sites not shown)")
+    return "\n".join(lines)
+
   def putLineNumber(self, justification):
     justification.logicLocation = self.callStack[-1]
 
@@ -546,6 +1147,16 @@ class LogicStatement(object):
   def getChildren(self):
     return self.children
 
+  #adds to <names> the names of any variables that this statement declares in the scope that it runs in
+  def declareNames(self, names):
+    pass
+
+  #tells this statement and its children which scopes their variables are declared in (see Execution.resolveStatements)
+  #Statements that run their children in a new scope must override this to resolve their children in a new StaticScope
+  def resolve(self, staticScope):
+    for child in self.getChildren():
+      child.resolve(staticScope)
+
   def process(self, justification):
     raise Exception("Called abstract method 'process' of LogicStatement " + str(self))
   
@@ -576,6 +1187,11 @@ class If(LogicStatement):
   def updateChild(self, child):
     self.children.append(child)
 
+  def declareNames(self, names):
+    #an If doesn't make a new scope, so anything declared by either branch is declared in the scope of the If
+    for statement in self.trueEffects + self.falseEffects:
+      statement.declareNames(names)
+
   def process(self, callJustification):
     result = self.condition.process(callJustification)
     #childJustification = FullJustification(str(self), result.value, self.lineNumber, callJustification, [result.justification])
@@ -598,6 +1214,19 @@ class ForEach(LogicStatement):
     self.children += statements
     self.statements = statements
     self.lineNumber = self.valuesProvider.lineNumber #show the line number of the top of the loop, rather than the line number of the bottom of the loop
+    self.declaresVariables = True #whether each iteration needs its own scope; decided by resolve
+    self.iteratorDescription = internText("loop iterator " + str(variableName))
+
+  def resolve(self, staticScope):
+    loopStaticScope = StaticScope(staticScope, [self.variableName])
+    self.valuesProvider.resolve(loopStaticScope)
+    bodyNames = self.execution.getDeclaredNames(self.statements)
+    #if the body doesn't declare anything, then it can run directly in the loop's scope rather than in a new scope per iteration
+    self.declaresVariables = len(bodyNames) > 0
+    if self.declaresVariables:
+      self.execution.resolveStatements(self.statements, StaticScope(loopStaticScope, bodyNames))
+    else:
+      self.execution.resolveStatements(self.statements, loopStaticScope)
 
   def process(self, callJustification):
     loopScope = self.execution.getScope().newChild("for loop of " + str(self.variableName))
@@ -608,16 +1237,19 @@ class ForEach(LogicStatement):
     values = valueInfos.value
     for valueInfo in values.getItems():
       value = valueInfo.value
-      justification = FullJustification("loop iterator " + str(self.variableName), value, self.lineNumber, callJustification, [valuesJustification, valueInfo.justification])
+      justification = FullJustification(self.iteratorDescription, value, self.lineNumber, callJustification, [valuesJustification, valueInfo.justification])
 
       loopScope.setInfo(self.variableName, JustifiedValue(value, justification))
 
-      iterationScope = self.execution.getScope().newChild("iteration where " + str(self.variableName) + " = " + str(value))
-      self.execution.addScope(iterationScope)
+      if self.declaresVariables:
+        iterationScope = self.execution.getScope().newChild("iteration where " + str(self.variableName) + " = " + str(value))
+        self.execution.addScope(iterationScope)
 
-      self.execution.runStatements(self.statements, justification)
+        self.execution.runStatements(self.statements, justification)
 
-      self.execution.removeScope()
+        self.execution.removeScope()
+      else:
+        self.execution.runStatements(self.statements, justification)
 
     self.execution.removeScope()
 
@@ -642,21 +1274,34 @@ class While(LogicStatement):
     self.children.append(condition)
     self.children += statements
     self.statements = statements
+    self.declaresVariables = True #whether each iteration needs its own scope; decided by resolve
+
+  def resolve(self, staticScope):
+    bodyNames = self.execution.getDeclaredNames(self.statements)
+    self.declaresVariables = len(bodyNames) > 0
+    if self.declaresVariables:
+      staticScope = StaticScope(staticScope, bodyNames)
+    self.condition.resolve(staticScope)
+    self.execution.resolveStatements(self.statements, staticScope)
 
   def process(self, callJustification):
     while True:
-      loopScope = self.execution.getScope().newChild("while (" + str(self.condition) + ")")
-      self.execution.addScope(loopScope)
+      if self.declaresVariables:
+        loopScope = self.execution.getScope().newChild("while (" + str(self.condition) + ")")
+        self.execution.addScope(loopScope)
 
       conditionInfo = self.condition.process(callJustification)
       if not conditionInfo.value:
+        if self.declaresVariables:
+          self.execution.removeScope()
         break
 
-      justification = FullJustification(str(self.condition), conditionInfo.value, self.lineNumber, callJustification, [conditionInfo.justification])
+      justification = FullJustification(self.condition, conditionInfo.value, self.lineNumber, callJustification, [conditionInfo.justification])
 
       self.execution.runStatements(self.statements, justification)
 
-      self.execution.removeScope()
+      if self.declaresVariables:
+        self.execution.removeScope()
 
   def __str__(self):
     return "while (" + str(self.condition) + ")"
@@ -668,11 +1313,24 @@ class Set(LogicStatement):
     super(Set, self).__init__()
     self.propertyName = propertyName
     self.valueProvider = valueProvider
+    self.scopeDepth = None #how many scopes up the variable is declared, if known; decided by resolve
+
+  def resolve(self, staticScope):
+    self.scopeDepth = staticScope.findDepth(self.propertyName)
+    self.valueProvider.resolve(staticScope)
 
   def process(self, callJustification):
     info = self.valueProvider.process(callJustification)
     justification = FullJustification(self.propertyName, info.value, self.lineNumber, callJustification, [info.justification])
-    self.execution.getScope().setInfo(self.propertyName, JustifiedValue(info.value, justification))
+    justifiedValue = JustifiedValue(info.value, justification)
+    scope = self.execution.getScope()
+    if self.scopeDepth is not None:
+      ownerScope = scope.getAncestor(self.scopeDepth)
+      #the scope might not have declared the variable yet, in which case this is assigning to a variable from further out
+      if ownerScope is not None and self.propertyName in ownerScope.data:
+        ownerScope.data[self.propertyName] = justifiedValue
+        return
+    scope.setInfo(self.propertyName, justifiedValue)
 
   def getChildren(self):
     return [self.valueProvider]
@@ -692,6 +1350,9 @@ class Var(Set):
     except Exception as e:
       logger.fail(traceback.format_exc(e), FullJustification("error", e, self.lineNumber, callJustification, []))
 
+  def declareNames(self, names):
+    names.add(self.propertyName)
+
 class Return(Var):
   def __init__(self, valueProvider):
     super(Return, self).__init__("return", valueProvider) #a hack for now
@@ -721,6 +1382,14 @@ class Func(LogicStatement):
   def process(self, justification):
     self.execution.getScope().declareFunction(FunctionDefinition(self.functionName, self.argumentNames, self.lineNumber, self.statements), justification)
 
+  def declareNames(self, names):
+    names.add(self.functionName)
+
+  def resolve(self, staticScope):
+    #the body of a function runs in a new child of the global scope (see Execution.newScope), not of the scope that declared the function
+    functionStaticScope = StaticScope(self.execution.rootStaticScope, self.argumentNames + list(self.execution.getDeclaredNames(self.statements)))
+    self.execution.resolveStatements(self.statements, functionStaticScope)
+
   def addStatements(self, statements):
     self.statements += statements
     self.children += statements
@@ -754,7 +1423,7 @@ class Call(LogicStatement):
     justifications = [info.justification for info in infos]
     if self.execution is None:
       raise Exception("execution is None for " + str(self))
-    text = "Call " + str(self.functionName) + "(" + ", ".join([str(info.value) for info in infos]) + ")"
+    text = DeferredText("Call %s(%s)", self.functionName, JoinedText(", ", infos))
     return self.execution.getScope().callFunctionName(self.functionName, infos, AndJustification(text, [callJustification]))
 
   def __str__(self):
@@ -764,34 +1433,1002 @@ class Call(LogicStatement):
 #############################################################################################################################################################################################
 #things relating to justifications
 
-justificationId = 0
-justificationsById = []
+#remembers justifications by id so that the user can ask about them later
+#Only the most recently created or looked-up justifications are held directly; older ones are evicted,
+#but an evicted justification can still be looked up for as long as something else (such as a JustifiedValue) refers to it
+class JustificationStore(object):
+  def __init__(self, capacity):
+    self.capacity = capacity
+    self.nextId = 0
+    self.recentJustifications = {} #Map<id, Justification>
+    self.usageOrder = collections.deque() #ids from least recently used to most recently used; an id appears again each time it is looked up
+    self.numLaterUsages = {} #Map<id, number of times that id appears again later in usageOrder>
+    self.evictedJustifications = weakref.WeakValueDictionary() #Map<id, Justification> of evicted justifications that are still alive
+    self.numEvicted = 0
+    self.numReleased = 0 #the number of justifications that a JustificationCollector found to be unreachable
+    self.journal = None #if not None, a JustificationJournal that justifications are written to as they are evicted, and that can look up justifications that have expired from memory
+
+  def setCapacity(self, capacity):
+    self.capacity = capacity
+    while len(self.recentJustifications) > self.capacity:
+      self.evictOne()
+
+  def add(self, justification):
+    justificationId = self.nextId
+    self.nextId += 1
+    self.recentJustifications[justificationId] = justification
+    self.usageOrder.append(justificationId)
+    if len(self.recentJustifications) > self.capacity:
+      self.evictOne()
+    return justificationId
+
+  #starts writing every justification created from now on to a JustificationJournal at this path, as each one is evicted
+  #Anything still in memory is written when the journal is flushed, which happens when this program exits (see flushJustificationJournal) and when logger.fail is called
+  #A session can start one from the command line with "--journal <path>" (see main)
+  def startJournal(self, path):
+    self.stopJournal()
+    self.journal = JustificationJournal(path, self.nextId)
+
+  def stopJournal(self):
+    if self.journal is not None:
+      self.flushJournal()
+      self.journal.close()
+      self.journal = None
+
+  def flushJournal(self):
+    if self.journal is not None:
+      heldJustifications = list(self.recentJustifications.values()) + list(self.evictedJustifications.values())
+      heldJustifications.sort(key=lambda justification: justification.justificationId)
+      self.journal.flush(heldJustifications)
+
+  def get(self, justificationId):
+    #returns the justification having the given id, or None if there is no such justification (anymore)
+    justification = self.recentJustifications.get(justificationId)
+    if justification is not None:
+      self.numLaterUsages[justificationId] = self.numLaterUsages.get(justificationId, 0) + 1
+      self.usageOrder.append(justificationId)
+      return justification
+    justification = self.evictedJustifications.get(justificationId)
+    if justification is not None:
+      #it's being used again, so make it recent again
+      del self.evictedJustifications[justificationId]
+      self.recentJustifications[justificationId] = justification
+      self.usageOrder.append(justificationId)
+      if len(self.recentJustifications) > self.capacity:
+        self.evictOne()
+      return justification
+    if self.journal is not None:
+      #it's no longer in memory, but it might have been written to the journal
+      return self.journal.get(justificationId)
+    return None
+
+  def isExpired(self, justificationId):
+    #tells whether the justification with this id existed but can no longer be looked up
+    if justificationId < 0 or justificationId >= self.nextId:
+      return False
+    if self.journal is not None and self.journal.contains(justificationId):
+      return False
+    return not self.isHeld(justificationId)
+
+  def isHeld(self, justificationId):
+    #tells whether the justification with this id is still in memory
+    return justificationId in self.recentJustifications or justificationId in self.evictedJustifications
+
+  def peek(self, justificationId):
+    #returns the justification having the given id if it's still in memory, or else None
+    #Unlike get, this doesn't count as using it, so it doesn't change which justifications are kept, and it doesn't read the journal
+    justification = self.recentJustifications.get(justificationId)
+    if justification is None:
+      justification = self.evictedJustifications.get(justificationId)
+    return justification
+
+  def evictOne(self):
+    while True:
+      justificationId = self.usageOrder.popleft()
+      numLaterUsages = self.numLaterUsages.get(justificationId, 0)
+      if numLaterUsages > 0:
+        #this justification was used again more recently, so it isn't the least recently used one
+        if numLaterUsages == 1:
+          del self.numLaterUsages[justificationId]
+        else:
+          self.numLaterUsages[justificationId] = numLaterUsages - 1
+        continue
+      justification = self.recentJustifications.pop(justificationId, None)
+      if justification is None:
+        #it was already released (see release)
+        continue
+      self.evictedJustifications[justificationId] = justification
+      self.numEvicted += 1
+      if self.journal is not None:
+        self.journal.record(justification)
+      return
+
+  #stops holding this justification directly (see JustificationCollector), leaving it to be found only while something else still refers to it
+  def release(self, justificationId):
+    justification = self.recentJustifications.pop(justificationId, None)
+    if justification is None:
+      return False
+    self.evictedJustifications[justificationId] = justification
+    self.numReleased += 1
+    if self.journal is not None:
+      self.journal.record(justification)
+    return True
+
+  #forgets the usages of released justifications, which release leaves in usageOrder because removing them one at a time would be slow
+  def compactUsageOrder(self):
+    usageOrder = collections.deque()
+    numUsages = {}
+    for justificationId in self.usageOrder:
+      if justificationId in self.recentJustifications:
+        usageOrder.append(justificationId)
+        numUsages[justificationId] = numUsages.get(justificationId, 0) + 1
+    self.usageOrder = usageOrder
+    self.numLaterUsages = dict([(justificationId, count - 1) for justificationId, count in numUsages.items() if count > 1])
+
+  #writes every justification still in memory to a JustificationTable at this path, and returns how many were written
+  def export(self, path):
+    return writeJustificationTable(path, list(self.recentJustifications.values()) + list(self.evictedJustifications.values()))
+
+  def getSize(self):
+    #the number of justifications held directly
+    return len(self.recentJustifications)
+
+  def getNumRetained(self):
+    #the number of evicted justifications that can still be looked up because something else refers to them
+    return len(self.evictedJustifications)
+
+  #lists the description templates used by the most justifications in memory, with how many bytes their (distinct) description objects take
+  def describeDescriptionMemory(self, maxNumTemplates=10):
+    counts = {} #Map<template, number of justifications>
+    descriptionsByTemplate = {} #Map<template, Map<id, description object>>
+    justifications = list(self.recentJustifications.values()) + list(self.evictedJustifications.values())
+    for justification in justifications:
+      template, description = justification.getDescriptionTemplate()
+      counts[template] = counts.get(template, 0) + 1
+      if description is not None:
+        descriptionsByTemplate.setdefault(template, {})[id(description)] = description
+    numBytesByTemplate = {}
+    for template, descriptions in descriptionsByTemplate.items():
+      numBytes = 0
+      for description in descriptions.values():
+        numBytes += sys.getsizeof(description)
+        if isinstance(description, DeferredText):
+          numBytes += sys.getsizeof(description.arguments)
+      numBytesByTemplate[template] = numBytes
+    templates = sorted(counts.keys(), key=lambda template: (-counts[template], str(template)))
+    numDescriptions = sum([len(descriptions) for descriptions in descriptionsByTemplate.values()])
+    lines = [str(len(justifications)) + " justifications in memory share " + str(numDescriptions) + " description objects taking " + str(sum(numBytesByTemplate.values())) + " bytes (" + str(len(internedTexts)) + " texts interned)"]
+    lines.append("  count    bytes  template")
+    for template in templates[:maxNumTemplates]:
+      lines.append("%7d %8d  %s" % (counts[template], numBytesByTemplate.get(template, 0), template))
+    if len(templates) > maxNumTemplates:
+      lines.append("(" + str(len(templates) - maxNumTemplates) + " more templates)")
+    return "\n".join(lines)
+
+  def __str__(self):
+    return "justification store holding " + str(self.getSize()) + "/" + str(self.capacity) + " recent justifications, " + str(self.numEvicted) + " evicted and " + str(self.numReleased) + " released (" + str(self.getNumRetained()) + " of which are still referenced)"
+
+justificationStore = JustificationStore(100000)
+
+#flushes the journal of whichever store is current when this program exits, so that it also holds the justifications that were never evicted
+def flushJustificationJournal():
+  justificationStore.flushJournal()
+atexit.register(flushJustificationJournal)
+
+#An append-only file of justifications, so that they can still be explained after they have been dropped from memory or after this program has exited
+#Each record holds a justification's id, kind, locations, supporter ids and description; see recordFormat
+#A justification is written when the JustificationStore evicts it, or when the journal is flushed, and its record is frozen from then on:
+#if it is marked interesting or uninteresting, or given a logic location, after it was written, the journal still holds its earlier state
+#Records are written in batches, in the order that they were evicted, and reading memory-maps the file and only decodes the records that are asked for (see JournaledJustification)
+class JustificationJournal(object):
+  recordFormat = struct.Struct("<qBiiI") #id, flags (see flagInteresting and flagFull), implementationLocation, logicLocation, number of supporters
+  #followed by that many supporter ids (each "<q"), then the length of the description ("<I") and the description itself
+  flagInteresting = 1
+  flagFull = 2
+  noLocation = -1 #stored in place of a location that is None
+  notWritten = -1 #stored in offsets for a justification that hasn't been written
+  batchSize = 1000
+
+  #if firstId is None, opens an existing journal for reading; otherwise creates a new journal for justifications having ids of at least firstId
+  def __init__(self, path, firstId=None):
+    self.path = path
+    self.pending = [] #justifications to write in the next batch
+    self.offsets = array.array("l") #the position in the file of the record of each justification (or notWritten), indexed by (id - firstId)
+    self.mapped = None
+    self.mappedSize = 0
+    self.loaded = weakref.WeakValueDictionary() #Map<id, JournaledJustification> already decoded and still in use, so that each id is decoded into at most one object at a time
+    if firstId is None:
+      self.file = None
+      self.readOffsets()
+    else:
+      self.file = open(path, "wb")
+      self.firstId = firstId
+      self.size = 0
+
+  def record(self, justification):
+    if justification.justificationId < self.firstId or self.file is None:
+      return
+    self.pending.append(justification)
+    if len(self.pending) >= self.batchSize:
+      self.flush()
+
+  #writes the pending justifications, plus any of the given ones that haven't been written yet
+  def flush(self, heldJustifications=[]):
+    if self.file is None:
+      return
+    justifications = self.pending + [justification for justification in heldJustifications if justification.justificationId >= self.firstId]
+    self.pending = []
+    chunks = []
+    for justification in justifications:
+      if self.isWritten(justification.justificationId):
+        #a justification that was used again after being evicted can be evicted again
+        continue
+      index = justification.justificationId - self.firstId
+      while len(self.offsets) <= index:
+        self.offsets.append(self.notWritten)
+      self.offsets[index] = self.size
+      chunk = self.encode(justification)
+      chunks.append(chunk)
+      self.size += len(chunk)
+    if len(chunks) > 0:
+      self.file.write(b"".join(chunks))
+      self.file.flush()
+
+  def close(self):
+    self.flush()
+    if self.file is not None:
+      self.file.close()
+      self.file = None
+    if self.mapped is not None:
+      self.mapped.close()
+      self.mapped = None
+      self.mappedSize = 0
+
+  def encode(self, justification):
+    flags = 0
+    if justification.interesting:
+      flags |= self.flagInteresting
+    if isinstance(justification, FullJustification):
+      flags |= self.flagFull
+    implementationLocation, logicLocation = justification.locations
+    supporterIds = [supporter.justificationId for supporter in justification.supporters]
+    description = justification.describe()
+    if not isinstance(description, bytes):
+      description = description.encode("utf-8")
+    return (self.recordFormat.pack(justification.justificationId, flags, self.encodeLocation(implementationLocation), self.encodeLocation(logicLocation), len(supporterIds)) +
+      struct.pack("<%dq" % len(supporterIds), *supporterIds) + struct.pack("<I", len(description)) + description)
+
+  def encodeLocation(self, location):
+    if location is None:
+      return self.noLocation
+    return location
+
+  def decodeLocation(self, location):
+    if location == self.noLocation:
+      return None
+    return location
+
+  #maps the file (again, if it has grown) so that records can be read from it
+  def remap(self):
+    size = os.path.getsize(self.path)
+    if size == self.mappedSize or size == 0:
+      return
+    if self.mapped is not None:
+      self.mapped.close()
+    with open(self.path, "rb") as readFile:
+      self.mapped = mmap.mmap(readFile.fileno(), 0, access=mmap.ACCESS_READ)
+    self.mappedSize = size
+
+  #finds where each record starts, reading only the fixed-size part of each record
+  def readOffsets(self):
+    self.remap()
+    ids = array.array("l")
+    offsets = array.array("l")
+    offset = 0
+    headerSize = self.recordFormat.size
+    while offset < self.mappedSize:
+      justificationId, flags, implementationLocation, logicLocation, numSupporters = self.recordFormat.unpack_from(self.mapped, offset)
+      ids.append(justificationId)
+      offsets.append(offset)
+      descriptionOffset = offset + headerSize + 8 * numSupporters
+      descriptionLength = struct.unpack_from("<I", self.mapped, descriptionOffset)[0]
+      offset = descriptionOffset + 4 + descriptionLength
+    if len(ids) == 0:
+      self.firstId = 0
+      return
+    self.firstId = min(ids)
+    self.offsets = array.array("l", [self.notWritten]) * (max(ids) - self.firstId + 1)
+    for index in range(len(ids)):
+      self.offsets[ids[index] - self.firstId] = offsets[index]
+
+  def isWritten(self, justificationId):
+    index = justificationId - self.firstId
+    return index >= 0 and index < len(self.offsets) and self.offsets[index] != self.notWritten
+
+  def contains(self, justificationId):
+    return self.isWritten(justificationId)
+
+  #returns a JournaledJustification for the justification with the given id, or None if this journal doesn't have it
+  def get(self, justificationId):
+    justification = self.loaded.get(justificationId)
+    if justification is not None:
+      return justification
+    if not self.isWritten(justificationId):
+      if len(self.pending) == 0:
+        return None
+      self.flush()
+      if not self.isWritten(justificationId):
+        return None
+    offset = self.offsets[justificationId - self.firstId]
+    if offset >= self.mappedSize:
+      self.remap()
+    recordId, flags, implementationLocation, logicLocation, numSupporters = self.recordFormat.unpack_from(self.mapped, offset)
+    offset += self.recordFormat.size
+    supporterIds = struct.unpack_from("<%dq" % numSupporters, self.mapped, offset)
+    offset += 8 * numSupporters
+    descriptionLength = struct.unpack_from("<I", self.mapped, offset)[0]
+    offset += 4
+    description = decodeText(self.mapped[offset:offset + descriptionLength])
+    justification = JournaledJustification(self, recordId, (flags & self.flagInteresting) != 0, (flags & self.flagFull) != 0,
+      (self.decodeLocation(implementationLocation), self.decodeLocation(logicLocation)), supporterIds, description)
+    self.loaded[justificationId] = justification
+    return justification
+
+  def getNumWritten(self):
+    return len(self.offsets) - self.offsets.count(self.notWritten)
+
+  def __str__(self):
+    return "journal " + str(self.path) + " of " + str(self.getNumWritten()) + " justifications from #" + str(self.firstId)
+
+#The justification graph as columns of numbers, for analysing it offline (which lines make the most justifications, how deep the chains go, and so on)
+#Columns (each an array of numbers, indexed by the position of the justification in ids, which is sorted):
+#  ids, kinds (index into kindNames), interesting (0 or 1), implementationLocations and logicLocations (noLocation if None), descriptions (index into the string table)
+#  supporterOffsets and supporterIds: the supporters of the justification at position i are supporterIds[supporterOffsets[i]:supporterOffsets[i + 1]] (compressed sparse rows)
+#  stringOffsets and stringData: string i of the string table is stringData[stringOffsets[i]:stringOffsets[i + 1]]
+#  kindNames: the index into the string table of the name of each kind
+#Written as raw arrays after a header line per column
+#Opening a file (see openJustificationTable) gives JournaledJustifications, which can be explained just like the originals
+class JustificationTable(object):
+  noLocation = -1
+  columnTypes = [("ids", "l"), ("kinds", "B"), ("interesting", "B"), ("implementationLocations", "l"), ("logicLocations", "l"), ("descriptions", "l"),
+    ("supporterOffsets", "l"), ("supporterIds", "l"), ("stringOffsets", "l"), ("stringData", "B"), ("kindNames", "l")]
+  header = "whyBot justification table\n"
+
+  def __init__(self, columns):
+    self.columns = columns #Map<column name, array>
+    self.ids = columns["ids"]
+    self.loaded = weakref.WeakValueDictionary() #Map<id, JournaledJustification>, like JustificationJournal.loaded
+
+  def getNumJustifications(self):
+    return len(self.ids)
+
+  def getString(self, index):
+    stringOffsets = self.columns["stringOffsets"]
+    start, end = int(stringOffsets[index]), int(stringOffsets[index + 1])
+    text = self.columns["stringData"][start:end]
+    if hasattr(text, "tobytes"):
+      text = text.tobytes()
+    else:
+      text = text.tostring()
+    return decodeText(text)
+
+  def getKindName(self, position):
+    return self.getString(int(self.columns["kindNames"][int(self.columns["kinds"][position])]))
+
+  def findPosition(self, justificationId):
+    position = bisect.bisect_left(self.ids, justificationId)
+    if position < len(self.ids) and self.ids[position] == justificationId:
+      return position
+    return None
+
+  #returns a JournaledJustification for the justification with the given id, or None if this table doesn't have it
+  def get(self, justificationId):
+    justification = self.loaded.get(justificationId)
+    if justification is not None:
+      return justification
+    position = self.findPosition(justificationId)
+    if position is None:
+      return None
+    columns = self.columns
+    locations = (self.decodeLocation(columns["implementationLocations"][position]), self.decodeLocation(columns["logicLocations"][position]))
+    supporterOffsets = columns["supporterOffsets"]
+    supporterIds = tuple([int(supporterId) for supporterId in columns["supporterIds"][int(supporterOffsets[position]):int(supporterOffsets[position + 1])]])
+    justification = JournaledJustification(self, justificationId, columns["interesting"][position] != 0, self.getKindName(position) == "FullJustification",
+      locations, supporterIds, self.getString(int(columns["descriptions"][position])))
+    self.loaded[justificationId] = justification
+    return justification
+
+  def decodeLocation(self, location):
+    if location == self.noLocation:
+      return None
+    return int(location)
+
+  #describes which lines made the most justifications, which justifications have the most supporters, and how long the longest chain is
+  def summarize(self, maxNumLines=5):
+    numJustifications = len(self.ids)
+    implementationLocations = self.columns["implementationLocations"]
+    supporterOffsets = self.columns["supporterOffsets"]
+    supporterIds = self.columns["supporterIds"]
+    counts = collections.Counter(implementationLocations)
+    lines = [str(numJustifications) + " justifications, " + str(len(supporterIds)) + " supporter edges, " + str(len(self.columns["stringOffsets"]) - 1) + " distinct strings"]
+    for location, count in counts.most_common(maxNumLines):
+      lines.append("  " + str(count) + " made at line " + str(self.decodeLocation(location)))
+    #supporters always have smaller ids, so each depth can be computed from the depths already computed
+    depths = {} #Map<id, depth>
+    maxNumSupporters = 0
+    maxDepth = 0
+    for position in range(numJustifications):
+      start, end = supporterOffsets[position], supporterOffsets[position + 1]
+      maxNumSupporters = max(maxNumSupporters, end - start)
+      depth = 1
+      for supporterId in supporterIds[start:end]:
+        supporterDepth = depths.get(supporterId, 0)
+        if supporterDepth >= depth:
+          depth = supporterDepth + 1
+      depths[self.ids[position]] = depth
+      maxDepth = max(maxDepth, depth)
+    lines.append("  at most " + str(maxNumSupporters) + " supporters per justification, and chains up to " + str(maxDepth) + " deep")
+    return "\n".join(lines)
+
+#writes these justifications to a JustificationTable file at this path, and returns the number written
+def writeJustificationTable(path, justifications):
+  justifications = sorted(justifications, key=lambda justification: justification.justificationId)
+  columns = dict([(name, array.array(typeCode)) for name, typeCode in JustificationTable.columnTypes])
+  stringIndices = {} #Map<string, index in the string table>
+  strings = []
+  kindIndices = {} #Map<class, index in kindNames>
+  kinds = columns["kinds"]
+  interesting = columns["interesting"]
+  implementationLocations = columns["implementationLocations"]
+  logicLocations = columns["logicLocations"]
+  descriptions = columns["descriptions"]
+  supporterOffsets = columns["supporterOffsets"]
+  supporterIds = columns["supporterIds"]
+  noLocation = JustificationTable.noLocation
+  for justification in justifications:
+    justificationClass = justification.__class__
+    kindIndex = kindIndices.get(justificationClass)
+    if kindIndex is None:
+      kindIndex = kindIndices[justificationClass] = len(kindIndices)
+      columns["kindNames"].append(len(strings))
+      strings.append(justificationClass.__name__)
+    kinds.append(kindIndex)
+    interesting.append(1 if justification.interesting else 0)
+    implementationLocation, logicLocation = justification.locations
+    implementationLocations.append(noLocation if implementationLocation is None else implementationLocation)
+    logicLocations.append(noLocation if logicLocation is None else logicLocation)
+    description = justification.describe()
+    stringIndex = stringIndices.get(description)
+    if stringIndex is None:
+      stringIndex = stringIndices[description] = len(strings)
+      strings.append(description)
+    descriptions.append(stringIndex)
+    supporterOffsets.append(len(supporterIds))
+    supporterIds.extend([supporter.justificationId for supporter in justification.supporters])
+  supporterOffsets.append(len(supporterIds))
+  columns["ids"].extend([justification.justificationId for justification in justifications])
+  stringOffsets = columns["stringOffsets"]
+  offset = 0
+  encodedStrings = []
+  for text in strings:
+    if not isinstance(text, bytes):
+      text = text.encode("utf-8")
+    stringOffsets.append(offset)
+    offset += len(text)
+    encodedStrings.append(text)
+  stringOffsets.append(offset)
+  appendBytes(columns["stringData"], b"".join(encodedStrings))
+  with open(path, "wb") as tableFile:
+    tableFile.write(JustificationTable.header.encode("utf-8"))
+    for name, typeCode in JustificationTable.columnTypes:
+      tableFile.write((name + " " + typeCode + " " + str(len(columns[name])) + "\n").encode("utf-8"))
+    for name, typeCode in JustificationTable.columnTypes:
+      columns[name].tofile(tableFile)
+  return len(justifications)
+
+#reads a file written by writeJustificationTable
+def openJustificationTable(path):
+  with open(path, "rb") as tableFile:
+    header = tableFile.readline()
+    if header != JustificationTable.header.encode("utf-8"):
+      raise Exception(str(path) + " isn't a justification table")
+    sizes = []
+    for name, typeCode in JustificationTable.columnTypes:
+      columnName, columnType, size = tableFile.readline().decode("utf-8").split()
+      sizes.append((columnName, columnType, int(size)))
+    columns = {}
+    for name, typeCode, size in sizes:
+      column = array.array(typeCode)
+      column.fromfile(tableFile, size)
+      columns[name] = column
+  return JustificationTable(columns)
+
+#turns bytes read from a file back into a str, which under Python 2 they already are
+def decodeText(text):
+  if isinstance(text, str):
+    return text
+  return text.decode("utf-8")
+
+#appends the bytes of this (byte) string to an array of typecode "B"
+def appendBytes(column, data):
+  if hasattr(column, "frombytes"):
+    column.frombytes(data)
+  else:
+    column.fromstring(data)
+
+#Decides which justifications the JustificationStore should keep holding: the ones that can still be asked about
+#Those are the justifications reachable from the values in an Execution's scopes (including the fields of objects, items of lists, and so on), and from the justifications that were recently shown to the user (see Execution.noteShownJustification)
+#Everything else is released from the store, which frees it unless something else still refers to it
+#A collection can be done a little at a time (see step), with the program running in between:
+#a justification created during a collection is never released by it, and a released justification that's still referred to stays available, so running in between can't lose anything that's still in use
+class JustificationCollector(object):
+  def __init__(self, execution):
+    self.execution = execution
+    self.store = None #the JustificationStore being collected, or None between collections
+    self.report = "no justifications have been collected yet"
+
+  def start(self):
+    self.store = justificationStore
+    self.firstNewId = self.store.nextId #justifications from here on were created during this collection
+    self.marked = set() #ids of reachable justifications
+    self.visited = set() #ids (from id()) of other reachable objects that have already been scanned
+    self.pending = [self.execution.rootScope] + list(self.execution.scopes) + list(self.execution.internedObjects.values())
+    for justificationId in self.execution.recentlyShownIds:
+      justification = self.store.get(justificationId)
+      if justification is not None:
+        self.pending.append(justification)
+    self.unmarkedIds = None #the ids to sweep, once marking is done
+    self.numHeldBefore = self.store.getSize()
+    self.releasedIds = []
+
+  #does about this many units of work, and returns whether the collection finished
+  def step(self, budget=20000):
+    if self.store is None:
+      self.start()
+    while budget > 0 and len(self.pending) > 0:
+      self.scan(self.pending.pop())
+      budget -= 1
+    if len(self.pending) > 0:
+      return False
+    if self.unmarkedIds is None:
+      self.unmarkedIds = [justificationId for justificationId in self.store.recentJustifications.keys() if justificationId < self.firstNewId and justificationId not in self.marked]
+      budget -= len(self.marked)
+      self.marked = None
+    while budget > 0 and len(self.unmarkedIds) > 0:
+      justificationId = self.unmarkedIds.pop()
+      if self.store.release(justificationId):
+        self.releasedIds.append(justificationId)
+      budget -= 1
+    if len(self.unmarkedIds) > 0:
+      return False
+    self.finish()
+    return True
+
+  #runs a whole collection at once
+  def collect(self):
+    while not self.step():
+      pass
+
+  def scan(self, item):
+    pending = self.pending
+    if isinstance(item, Justification):
+      if item.justificationId not in self.marked:
+        self.marked.add(item.justificationId)
+        pending.extend(item.supporters)
+      return
+    if isinstance(item, JustifiedValue):
+      pending.append(item.justification)
+      if item.value is not None:
+        pending.append(item.value)
+      return
+    if id(item) in self.visited:
+      return
+    if isinstance(item, Scope):
+      self.visited.add(id(item))
+      pending.extend(item.data.values())
+      if item.parent is not None:
+        pending.append(item.parent)
+      if isinstance(item, NativeObject):
+        #native objects keep their values in their own fields
+        pending.extend(vars(item).values())
+    elif isinstance(item, (list, tuple)):
+      self.visited.add(id(item))
+      pending.extend(item)
+    elif isinstance(item, dict):
+      self.visited.add(id(item))
+      pending.extend(item.values())
+    elif isinstance(item, (ClassDefinition, NativeClassDefinition)):
+      self.visited.add(id(item))
+      if item.implementedInScope is not None:
+        pending.append(item.implementedInScope)
+
+  def finish(self):
+    store = self.store
+    store.compactUsageOrder()
+    numStillReferenced = len([justificationId for justificationId in self.releasedIds if justificationId in store.evictedJustifications])
+    numFreed = len(self.releasedIds) - numStillReferenced
+    self.report = ("last collection released " + str(len(self.releasedIds)) + " of " + str(self.numHeldBefore) + " held justifications, freeing " + str(numFreed) +
+      " (" + str(numStillReferenced) + " are still referred to)")
+    self.store = None
+    self.visited = None
+    self.releasedIds = None
+
+  def __str__(self):
+    return self.report
+
+#Many justifications are created, so they are kept small:
+#each one uses __slots__, stores its supporters in a tuple (sharing one empty tuple when it has none),
+#and shares its (implementationLocation, logicLocation) pair with every other justification from the same lines
+noSupporters = ()
+locationPairs = {} #Map<(implementationLocation, logicLocation), the same tuple>
+
+def internLocations(implementationLocation, logicLocation):
+  pair = (implementationLocation, logicLocation)
+  return locationPairs.setdefault(pair, pair)
+
+#Descriptions that are assembled at runtime but repeat (such as "called talk") are interned so that every justification having one shares the same string
+#(String literals in this file are already shared by Python)
+internedTexts = {} #Map<text, the same text>
+
+def internText(text):
+  return internedTexts.setdefault(text, text)
+
+#Most descriptions are never displayed, so hot paths describe their justifications with these classes instead of strings
+#They hold onto the (immutable or append-only) values to describe and only assemble the text in __str__, when it is displayed
+
+#a template like "appended %s to %s" plus the arguments to fill into it
+class DeferredText(object):
+  __slots__ = ("template", "arguments")
+
+  def __init__(self, template, *arguments):
+    self.template = template
+    self.arguments = arguments
+
+  def __str__(self):
+    return self.template % tuple([str(argument) for argument in self.arguments])
+
+#the texts of some items, separated by a separator
+class JoinedText(object):
+  __slots__ = ("separator", "items")
+
+  def __init__(self, separator, items):
+    self.separator = separator
+    self.items = items
+
+  def __str__(self):
+    return self.separator.join([str(item) for item in self.items])
+
+#the first few items of a list that is only ever appended to
+class ListPrefixText(object):
+  __slots__ = ("items", "length")
+
+  def __init__(self, items):
+    self.items = items
+    self.length = len(items)
+
+  def __str__(self):
+    return str(self.items[:self.length])
+
+#the text 'owner.propertyName'
+class GetterText(object):
+  __slots__ = ("owner", "propertyName")
+
+  def __init__(self, owner, propertyName):
+    self.owner = owner
+    self.propertyName = propertyName
+
+  def __str__(self):
+    return stringUtils.toGetterText(self.owner, self.propertyName)
 
 justification_startLine = externalStackInfo.get_root_relevantLineNumber()
+#Which justifications an Execution records (see Program.run)
+#Recording every justification lets anything be explained, but costs an allocation and a stack walk for each one, which batch runs (such as running the Solver over a large knowledge base) don't need
+#Each justification that isn't recorded is replaced by nullJustification, which explains that it wasn't recorded
+#A selective Provenance (see selectedProvenance) instead records only the justifications about the chosen variables, classes and lines, and collapses the rest (see ProvenanceSampler.collapse)
+class Provenance(object):
+  def __init__(self, description, sampleInterval=1, topLevelOnly=False, variableNames=(), classNames=(), lineRanges=(), recordsLines=True):
+    self.description = description
+    self.sampleInterval = sampleInterval #records one of every sampleInterval justifications, or none if 0
+    self.topLevelOnly = topLevelOnly #whether to skip every justification created inside a block (such as a loop body or function body)
+    self.variableNames = set(variableNames) #records the FullJustifications of these variables and properties
+    self.classNames = set(classNames) #records the FullJustifications of values that are instances of these classes, and of properties of such instances
+    self.lineRanges = list(lineRanges) #records every justification created while running a line of the program in one of these (minInclusive, maxExclusive) ranges, like ExternalStackInfo.ignoreRange
+    self.isSelective = len(self.variableNames) > 0 or len(self.classNames) > 0 or len(self.lineRanges) > 0
+    self.recordsLines = recordsLines #whether justifications record the lines of this file that created them (see Program.run)
+
+  def recordsEverything(self):
+    return self.sampleInterval == 1 and not self.topLevelOnly and not self.isSelective
+
+  #tells whether a selective Provenance records the justification that is about to be created from these arguments while running this line of the program
+  def selects(self, justificationClass, arguments, lineNumber):
+    if lineNumber is not None:
+      for minInclusive, maxExclusive in self.lineRanges:
+        if lineNumber >= minInclusive and lineNumber < maxExclusive:
+          return True
+    if justificationClass is FullJustification:
+      variableName = arguments[0]
+      if isinstance(variableName, GetterText):
+        if variableName.propertyName in self.variableNames or self.isSelectedObject(variableName.owner):
+          return True
+      elif variableName in self.variableNames:
+        return True
+      return self.isSelectedObject(arguments[1])
+    return False
+
+  def isSelectedObject(self, value):
+    if len(self.classNames) == 0 or not isinstance(value, Object):
+      return False
+    classInfo = value.data.get("__class__")
+    return classInfo is not None and classInfo.value.className in self.classNames
+
+  def __str__(self):
+    return self.description
+
+fullProvenance = Provenance("full provenance")
+noProvenance = Provenance("no provenance", 0)
+
+def sampledProvenance(sampleInterval):
+  return Provenance("every " + str(sampleInterval) + "th justification", sampleInterval)
+
+topLevelProvenance = Provenance("top-level statements only", topLevelOnly=True)
+noLinesProvenance = Provenance("no implementation lines", recordsLines=False)
+
+#records only what's about these variables, classes and (minInclusive, maxExclusive) ranges of lines of the program
+def selectedProvenance(variableNames=(), classNames=(), lineRanges=()):
+  selections = [name for name in variableNames] + ["class " + name for name in classNames] + ["lines " + str(minInclusive) + "-" + str(maxExclusive - 1) for minInclusive, maxExclusive in lineRanges]
+  return Provenance("only " + ", ".join(selections), variableNames=variableNames, classNames=classNames, lineRanges=lineRanges)
+
+#Applies the Provenance of the running Execution
+#While everything is being recorded (the usual case), justifications are created normally
+#Otherwise, isSampling is set, and Justification.__new__ asks createJustification whether to make a new justification or to return a stand-in, before any of its work happens
+class ProvenanceSampler(object):
+  maxNumCollapsedSupporters = 4 #see collapse
+
+  def __init__(self):
+    self.provenance = fullProvenance
+    self.execution = None
+    self.numCreated = 0
+    self.numSkipped = 0
+    self.lineSummaries = {} #Map<line number, NullJustification standing in for the unrecorded justifications of that line>
+    self.lastCollapsed = None #the most recent CollapsedJustification, which is reused while the recorded supporters stay the same
+    self.isSampling = False #whether the current Provenance skips any justifications
+
+  def run(self, provenance, execution, function):
+    if provenance.recordsEverything() and self.provenance.recordsEverything():
+      return function()
+    previousProvenance, previousExecution = self.provenance, self.execution
+    self.activate(provenance, execution)
+    try:
+      return function()
+    finally:
+      self.activate(previousProvenance, previousExecution)
+
+  def activate(self, provenance, execution):
+    if execution is not self.execution:
+      self.lineSummaries = {}
+      self.lastCollapsed = None
+    self.provenance = provenance
+    self.execution = execution
+    self.isSampling = not provenance.recordsEverything()
+
+  def createJustification(self, justificationClass, *args):
+    provenance = self.provenance
+    if provenance.isSelective:
+      lineNumber = self.execution.callStack[-1]
+      if provenance.selects(justificationClass, args, lineNumber):
+        self.numCreated += 1
+        return object.__new__(justificationClass)
+      self.numSkipped += 1
+      return self.collapse(self.getArgumentSupporters(justificationClass, args), lineNumber)
+    if provenance.topLevelOnly and len(self.execution.callStack) > 2:
+      self.numSkipped += 1
+      return nullJustification
+    self.numCreated += 1
+    if provenance.sampleInterval == 0 or self.numCreated % provenance.sampleInterval != 0:
+      self.numSkipped += 1
+      return nullJustification
+    return object.__new__(justificationClass)
+
+  #returns the supporters that a justification of this class would get from these constructor arguments
+  def getArgumentSupporters(self, justificationClass, arguments):
+    if justificationClass is FullJustification:
+      return [arguments[3]] + arguments[4]
+    if justificationClass is AndJustification:
+      return arguments[1]
+    if justificationClass is EqualJustification:
+      return (arguments[2],)
+    return noSupporters
+
+  #returns what stands in for a justification that wasn't selected
+  #If none of its supporters were recorded, that's the summary of its line, which is shared and so costs nothing
+  #Otherwise, it's a CollapsedJustification linking to the recorded supporters, so that the chains of selected justifications stay connected
+  #A CollapsedJustification among the supporters is replaced by its own supporters, so consecutive unselected justifications (such as the several inside one call to a native method) usually collapse into the same one
+  #(unless that would make more than maxNumCollapsedSupporters, which would otherwise keep growing along a chain of them)
+  def collapse(self, supporters, lineNumber):
+    recordedSupporters = [supporter for supporter in supporters if supporter.justificationId >= 0]
+    flattenedSupporters = []
+    for supporter in recordedSupporters:
+      if isinstance(supporter, CollapsedJustification):
+        for collapsedSupporter in supporter.supporters:
+          if collapsedSupporter not in flattenedSupporters:
+            flattenedSupporters.append(collapsedSupporter)
+      elif supporter not in flattenedSupporters:
+        flattenedSupporters.append(supporter)
+    if len(flattenedSupporters) <= self.maxNumCollapsedSupporters:
+      recordedSupporters = flattenedSupporters
+    if len(recordedSupporters) == 0:
+      if lineNumber is None:
+        return nullJustification
+      summary = self.lineSummaries.get(lineNumber)
+      if summary is None:
+        summary = NullJustification("(not recorded: details of line " + str(lineNumber) + ")", lineNumber)
+        self.lineSummaries[lineNumber] = summary
+      return summary
+    recordedSupporters = tuple(recordedSupporters)
+    if self.lastCollapsed is None or self.lastCollapsed.supporters != recordedSupporters:
+      self.lastCollapsed = CollapsedJustification(recordedSupporters)
+    return self.lastCollapsed
+
+provenanceSampler = ProvenanceSampler()
+
 #class telling why something happened
 class Justification(object):
+  __slots__ = ("supporters", "justificationId", "isInteresting", "locations", "cachedInterestingChildren", "supporteeIds", "__weakref__")
+
   def __init__(self):
-    global justificationId
-    self.supporters = []
-    self.justificationId = justificationId
-    justificationId += 1
-    justificationsById.append(self)
-    self.interesting = True
-    self.implementationLocation = externalStackInfo.get_leaf_relevantLineNumber()
-    self.logicLocation = None
+    self.supporters = noSupporters
+    self.justificationId = justificationStore.add(self)
+    self.isInteresting = True
+    self.cachedInterestingChildren = None
+    self.supporteeIds = None #the ids of the justifications that this one supports (see addSupporters): None if none, the id if just one, or else a list of ids
+    self.locations = internLocations(externalStackInfo.get_leaf_relevantLineNumber(), None)
+
+  #lets the running Provenance skip this justification (see ProvenanceSampler)
+  def __new__(justificationClass, *args):
+    if provenanceSampler.isSampling:
+      return provenanceSampler.createJustification(justificationClass, *args)
+    return object.__new__(justificationClass)
+
+  def get_implementationLocation(self):
+    return self.locations[0]
+
+  implementationLocation = property(get_implementationLocation)
+
+  def get_interesting(self):
+    return self.isInteresting
+
+  #Justifications are often marked uninteresting after other justifications already depend on them
+  #The interesting children cached by those justifications might have included this one or skipped over it, so they're recomputed
+  def set_interesting(self, interesting):
+    self.isInteresting = interesting
+    if self.supporteeIds is not None:
+      self.forgetSupporteesInterestingChildren()
+
+  interesting = property(get_interesting, set_interesting)
+
+  def get_logicLocation(self):
+    return self.locations[1]
+
+  def set_logicLocation(self, logicLocation):
+    self.locations = internLocations(self.locations[0], logicLocation)
+
+  logicLocation = property(get_logicLocation, set_logicLocation)
 
   def addSupporter(self, supporter):
-    if not isinstance(supporter, Justification):
-      logger.fail("Invalid justification " + str(supporter) + " (not a subclass of Justification) given as support for " + str(self), self)
-    if supporter.justificationId > self.justificationId:
-      logger.fail("Added a supporter (" + str(supporter) + ") with higher id to the supportee (" + str(self) + ")")
-    self.supporters.append(supporter)
-    if self.logicLocation is None:
-      self.logicLocation = supporter.logicLocation
+    self.addSupporters((supporter,))
+
+  def addSupporters(self, supporters):
+    logicLocation = self.locations[1]
+    justificationId = self.justificationId
+    for supporter in supporters:
+      if not isinstance(supporter, Justification):
+        logger.fail("Invalid justification " + str(supporter) + " (not a subclass of Justification) given as support for " + str(self), self)
+      if supporter.justificationId > justificationId:
+        logger.fail("Added a supporter (" + str(supporter) + ") with higher id to the supportee (" + str(self) + ")")
+      if logicLocation is None:
+        logicLocation = supporter.locations[1]
+      #record the reverse edge too, so we can tell what each justification influenced
+      #Supportees are remembered by id rather than by reference so that they don't keep each other alive
+      #Most justifications support only one other, so a single id isn't put into a list
+      supporteeIds = supporter.supporteeIds
+      if supporteeIds is None:
+        supporter.supporteeIds = justificationId
+      elif not isinstance(supporteeIds, list):
+        supporter.supporteeIds = [supporteeIds, justificationId]
+      else:
+        supporteeIds.append(justificationId)
+        numSupportees = len(supporteeIds)
+        if numSupportees >= 64 and (numSupportees & (numSupportees - 1)) == 0:
+          supporter.forgetExpiredSupportees()
+    self.supporters = self.supporters + tuple(supporters)
+    if logicLocation != self.locations[1]:
+      self.logicLocation = logicLocation
 
   def getSupporters(self):
     return self.supporters
 
+  #A long-lived justification (such as the one for a top-level statement) can support very many short-lived ones,
+  #so each time its number of supportees doubles, it forgets the ones that can no longer be looked up
+  def forgetExpiredSupportees(self):
+    self.supporteeIds = [supporteeId for supporteeId in self.supporteeIds if justificationStore.isHeld(supporteeId)]
+
+  #forgets the cached interesting children of the justifications that this one supports
+  #An uninteresting supportee's children were copied into its own supportees' caches, so those are forgotten too
+  def forgetSupporteesInterestingChildren(self):
+    for supportee in self.getSupportees():
+      if supportee.cachedInterestingChildren is not None:
+        supportee.cachedInterestingChildren = None
+        if not supportee.interesting and supportee.supporteeIds is not None:
+          supportee.forgetSupporteesInterestingChildren()
+
+  #returns the justifications that this one directly supports and that are still in memory
+  #Asking what a justification influenced is only reading, so it doesn't change which justifications the store keeps (see JustificationStore.peek)
+  def getSupportees(self):
+    supporteeIds = self.supporteeIds
+    if supporteeIds is None:
+      return []
+    if not isinstance(supporteeIds, list):
+      supporteeIds = [supporteeIds]
+    supportees = []
+    for supporteeId in supporteeIds:
+      supportee = justificationStore.peek(supporteeId)
+      if supportee is not None:
+        supportees.append(supportee)
+    return supportees
+
+  #returns the justifications to show when describing what this one influenced: like getInterestingChildren, but following supporters in the other direction
+  def getInterestingSupportees(self):
+    results = []
+    found = set()
+    pending = self.getSupportees()
+    pending.reverse()
+    while len(pending) > 0:
+      supportee = pending.pop()
+      if supportee in found:
+        continue
+      found.add(supportee)
+      if supportee.interesting:
+        results.append(supportee)
+      else:
+        later = supportee.getSupportees()
+        later.reverse()
+        pending.extend(later)
+    return results
+
+  #yields the lines describing what this justification influenced, up to <maxDepth> levels of supportees (or all of them if maxDepth is negative), in the format of iterateExplanation
+  def iterateImpact(self, maxDepth=1):
+    shownIds = set()
+    pending = [(self, "", "", maxDepth)]
+    while len(pending) > 0:
+      item = pending.pop()
+      if not isinstance(item, tuple):
+        yield item
+        continue
+      justification, firstPrefix, restPrefix, depth = item
+      description = justification.describeWithId()
+      after = []
+      if justification.justificationId in shownIds:
+        description += " influenced"
+        after.append(restPrefix + "|- (see #" + str(justification.justificationId) + " above)")
+      else:
+        supportees = justification.getInterestingSupportees()
+        if len(supportees) > 0:
+          description += " influenced"
+          if depth == 0:
+            after.append(restPrefix + "|- (" + str(len(supportees)) + " more)")
+          else:
+            shownIds.add(justification.justificationId)
+            for supporteeIndex in range(len(supportees)):
+              if supporteeIndex > 0:
+                after.append(restPrefix + "| ")
+              after.append((supportees[supporteeIndex], restPrefix + "|-", restPrefix + "| ", depth - 1))
+      descriptionLines = description.split("\n")
+      yield firstPrefix + descriptionLines[0]
+      for line in descriptionLines[1:]:
+        yield restPrefix + line
+      after.reverse()
+      pending.extend(after)
+
   def describe(self):
     raise Exception("Invoked abstract method 'describe' of " + str(self))
 
@@ -803,43 +2440,82 @@ class Justification(object):
     return description    
 
   def explainRecursive(self, maxDepth=-1):
-    description = self.describeWithId()
-    newlineDash = "\n|-"
-    newlineIndent = "\n| "
-    if maxDepth == 0:
-      if len(self.supporters) != 0:
+    return "\n".join(self.iterateExplanation(maxDepth))
+
+  #yields the lines explaining this justification and its supporters, up to <maxDepth> levels deep (or all of them if maxDepth is negative)
+  #The lines are generated as the supporters are walked, so a caller can show the first lines before the rest are computed (see PrintLogger.explain)
+  #Many justifications share supporters (such as the justification for a call), so this explains each justification only once:
+  #reaching it again just refers back to where it was already explained, which keeps the output linear in the number of distinct justifications
+  def iterateExplanation(self, maxDepth=-1):
+    explainedDepths = {} #Map<justificationId, the maxDepth that the justification was explained with>
+    #each pending item is either a line of text or a (justification, first line prefix, prefix of later lines, maxDepth) tuple to explain
+    pending = [(self, "", "", maxDepth)]
+    while len(pending) > 0:
+      item = pending.pop()
+      if not isinstance(item, tuple):
+        yield item
+        continue
+      justification, firstPrefix, restPrefix, depth = item
+      description = justification.describeWithId()
+      if depth == 0:
+        after = []
+        if len(justification.supporters) != 0:
+          description += " because"
+          after.append(restPrefix + "|- (more)")
+      else:
         description += " because"
-        description += newlineDash + " (more)"
-    else:
-      interestingChildren = self.getInterestingChildren()
-      #if len(self.supporters) == 1:
-      #  #description = "(skipping " + description + ")\n" anything with only one justification is considered too simple to be worth explaining
-      #  description = self.supporters[0].explainRecursive(maxDepth)
-      #  return description
-      description += " because"
-      for reasonIndex in range(len(interestingChildren)):
-        reason = interestingChildren[reasonIndex]
-        if reasonIndex > 0:
-          description += newlineIndent
-        lines = reason.explainRecursive(maxDepth - 1).split("\n")
-        for lineIndex in range(len(lines)):
-          line = lines[lineIndex]
-          if lineIndex == 0:
-            description += newlineDash + line
-          else:
-            description += newlineIndent + line
-    return description
-
+        justificationId = justification.justificationId
+        explainedDepth = explainedDepths.get(justificationId)
+        if explainedDepth is not None and (explainedDepth < 0 or (depth > 0 and depth <= explainedDepth)):
+          after = [restPrefix + "|- (see #" + str(justificationId) + " above)"]
+        else:
+          interestingChildren = justification.getInterestingChildren()
+          if len(interestingChildren) > 0:
+            explainedDepths[justificationId] = depth
+          after = justification.getExplanationItems(interestingChildren, restPrefix, depth - 1)
+      descriptionLines = description.split("\n")
+      yield firstPrefix + descriptionLines[0]
+      for line in descriptionLines[1:]:
+        yield restPrefix + line
+      after.reverse()
+      pending.extend(after)
+
+  #returns the items (see iterateExplanation) that explain these children of this justification
+  def getExplanationItems(self, interestingChildren, restPrefix, maxDepth):
+    items = []
+    for reasonIndex in range(len(interestingChildren)):
+      if reasonIndex > 0:
+        items.append(restPrefix + "| ")
+      items.append((interestingChildren[reasonIndex], restPrefix + "|-", restPrefix + "| ", maxDepth))
+    return items
+
+  #returns the supporters to show when explaining this justification: its interesting supporters, with each uninteresting supporter replaced by its own interesting children
+  #This is computed the first time it's needed, and computed again if a supporter is marked (un)interesting afterward (see set_interesting)
   def getInterestingChildren(self):
+    if self.cachedInterestingChildren is None:
+      self.cachedInterestingChildren = self.findInterestingChildren()
+    return self.cachedInterestingChildren
+
+  def findInterestingChildren(self):
+    return self.collectInterestingChildren(self.supporters)
+
+  def collectInterestingChildren(self, children):
     results = []
-    for child in self.supporters:
+    found = set() #justifications compare by identity, so this finds duplicates without searching the list
+    for child in children:
       if child.interesting:
         results.append(child)
+        found.add(child)
       else:
         for descendent in child.getInterestingChildren():
-          if descendent not in results:
+          if descendent not in found:
             results.append(descendent)
-    return results
+            found.add(descendent)
+    return tuple(results)
+
+  #returns the template that this justification's description is made from (for grouping in JustificationStore.describeDescriptionMemory), and the object it keeps to describe itself (or None if there isn't one)
+  def getDescriptionTemplate(self):
+    return (self.__class__.__name__, None)
 
   def describeWithId(self):
     return self.getIdText() + self.describe()
@@ -859,12 +2535,14 @@ class Justification(object):
 
 #justification of something caused by other things	
 class AndJustification(Justification):
+  __slots__ = ("description",)
+
   def __init__(self, description, justifications):
     super(AndJustification, self).__init__()
     self.description = description
-    for justification in justifications:
-      self.addSupporter(justification)
-    if "__main__" in description:
+    if len(justifications) > 0:
+      self.addSupporters(justifications)
+    if isinstance(description, type("")) and "__main__" in description:
       logger.fail("Invalid description (probably invalid class) passed to AndJustification: " + description, self)
 
   def describe(self):
@@ -872,96 +2550,247 @@ class AndJustification(Justification):
     description += str(self.description)
     return description
 
+  def getDescriptionTemplate(self):
+    description = self.description
+    if isinstance(description, DeferredText):
+      return (description.template, description)
+    if isinstance(description, str):
+      return (description, description)
+    return (description.__class__.__name__, description)
+
 #justification of something that's only represented by text'
 class TextJustification(AndJustification):
+  __slots__ = ()
+
   def __init__(self, message):
     super(TextJustification, self).__init__(message, [])
 
 #class for when we don't know the justification'
 class UnknownJustification(TextJustification):
+  __slots__ = ()
+
   def __init__(self):
     super(UnknownJustification, self).__init__("""Idk.""")
   
 #says that two things are equal
 class EqualJustification(Justification):
+  __slots__ = ("itemDescription", "itemValue")
+
   def __init__(self, description, value, valueJustification):
     super(EqualJustification, self).__init__()
     self.itemDescription = description
     self.itemValue = value
-    self.valueJustification = valueJustification
-    self.addSupporter(self.valueJustification)
+    self.addSupporter(valueJustification)
+
+  def get_valueJustification(self):
+    return self.supporters[0]
+
+  valueJustification = property(get_valueJustification)
 
   def describe(self):
     return self.itemDescription + ' equals "' + str(self.itemValue) + '"'
 
+  def getDescriptionTemplate(self):
+    return ('%s equals "%s"', self.itemDescription)
+
 class FullJustification(Justification):
+  __slots__ = ("variableName", "value")
+
   def __init__(self, variableName, value, logicLocation, callJustification, valueJustifications):
     super(FullJustification, self).__init__()
     self.variableName = variableName
     self.value = value
-    self.callJustification = callJustification
     self.logicLocation = logicLocation
-    self.valueJustifications = valueJustifications
     if not isinstance(valueJustifications, list):
       logger.fail("Invalid (non-list) value provided for argument 'justifications' to FullJustification.__init__", callJustification)
-    for supporter in [callJustification] + valueJustifications:
-      self.addSupporter(supporter)
-    if self.logicLocation is None:
+    self.addSupporters([callJustification] + valueJustifications)
+    if self.logicLocation is None and externalStackInfo.enabled:
       logger.fail("Empy logicLocation for FullJustification", callJustification)
     self.interesting = True
 
+  #the first supporter is the justification for the call, and the rest are the justifications for the value
+  def get_callJustification(self):
+    return self.supporters[0]
+
+  callJustification = property(get_callJustification)
+
+  def get_valueJustifications(self):
+    return self.supporters[1:]
+
+  valueJustifications = property(get_valueJustifications)
+
   def describe(self):
     message = ""
     #if self.logicLocation is not None:
     message += "[lines " + str(self.implementationLocation) + "/" + str(self.logicLocation) + "]: "
-    message += stringUtils.toVariableText(self.variableName) + " = " + str(self.value)
+    message += stringUtils.toVariableText(str(self.variableName)) + " = " + str(self.value)
     return message
 
-  def getInterestingChildren(self):
+  def getDescriptionTemplate(self):
+    return ("<variable> = <value>", None)
+
+  def findInterestingChildren(self):
     if self.interesting:
-      return super(FullJustification, self).getInterestingChildren()
+      return super(FullJustification, self).findInterestingChildren()
     else:
       #if this justification is not interesting, then the reason that it was called isn't interesting either - only recurse into children that supply values
-      results = []
-      for child in self.valueJustifications:
-        if child.interesting:
-          results.append(child)
-        else:
-          for descendent in child.getInterestingChildren():
-            if descendent not in results:
-              results.append(descendent)
-      return results
+      return self.collectInterestingChildren(self.valueJustifications)
 
 
-  def explainRecursive(self, maxDepth=-1):
-    description = self.describeWithId()
-    newlineDash = "\n|-"
-    newlineIndent = "\n| "
-    if maxDepth == 0:
-      if len(self.supporters) != 0:
-        description += " because"
-        description += newlineDash + " (more)"
-    else:
-      interestingChildren = self.getInterestingChildren()
-      #if len(self.supporters) == 1:
-      #  #description = "(skipping " + description + ")\n" anything with only one justification is considered too simple to be worth explaining
-      #  description = self.supporters[0].explainRecursive(maxDepth)
-      #  return description
-      description += " because"
-      for reasonIndex in range(len(interestingChildren)):
-        if reasonIndex > 0:
-          description += newlineIndent
-        reason = interestingChildren[reasonIndex]
-        description += newlineDash
-        if reason == self.callJustification:
-          description += "Called because"
-        else:
-          description += "True because"      
-        lines = reason.explainRecursive(maxDepth - 1).split("\n")
-        for lineIndex in range(len(lines)):
-          line = lines[lineIndex]
-          description += newlineIndent + line
-    return description
+  def getExplanationItems(self, interestingChildren, restPrefix, maxDepth):
+    items = []
+    for reasonIndex in range(len(interestingChildren)):
+      if reasonIndex > 0:
+        items.append(restPrefix + "| ")
+      reason = interestingChildren[reasonIndex]
+      if reason is self.callJustification:
+        items.append(restPrefix + "|-Called because")
+      else:
+        items.append(restPrefix + "|-True because")
+      items.append((reason, restPrefix + "| ", restPrefix + "| ", maxDepth))
+    return items
+
+#a justification read back from a JustificationJournal (or from a JustificationTable, which has the same get method)
+#It knows its supporters only by id, and reads each of them from the journal when they're needed, so explaining it doesn't load the whole journal
+class JournaledJustification(Justification):
+  __slots__ = ("journal", "isFull", "supporterIds", "description")
+
+  #always created, even while a Provenance is skipping new justifications
+  def __new__(justificationClass, *args):
+    return object.__new__(justificationClass)
+
+  def __init__(self, journal, justificationId, interesting, isFull, locations, supporterIds, description):
+    #doesn't call Justification.__init__, because this justification already got its id when it was first created
+    self.journal = journal
+    self.justificationId = justificationId
+    self.isInteresting = interesting
+    self.isFull = isFull
+    self.locations = locations
+    self.supporterIds = supporterIds
+    self.description = description
+    self.cachedInterestingChildren = None
+    self.supporteeIds = None
+
+  #supporters from before the journal was started aren't in it, so they're left out
+  def get_supporters(self):
+    supporters = []
+    for supporterId in self.supporterIds:
+      supporter = self.journal.get(supporterId)
+      if supporter is not None:
+        supporters.append(supporter)
+    return tuple(supporters)
+
+  supporters = property(get_supporters)
+
+  def describe(self):
+    return self.description
+
+  #explained in the same format as the kind of justification that was recorded
+  def findInterestingChildren(self):
+    if self.isFull and not self.interesting:
+      return self.collectInterestingChildren([supporter for supporter in self.supporters if supporter.justificationId != self.supporterIds[0]])
+    return super(JournaledJustification, self).findInterestingChildren()
+
+  def getExplanationItems(self, interestingChildren, restPrefix, maxDepth):
+    if not self.isFull:
+      return super(JournaledJustification, self).getExplanationItems(interestingChildren, restPrefix, maxDepth)
+    items = []
+    for reasonIndex in range(len(interestingChildren)):
+      if reasonIndex > 0:
+        items.append(restPrefix + "| ")
+      reason = interestingChildren[reasonIndex]
+      if reason.justificationId == self.supporterIds[0]:
+        items.append(restPrefix + "|-Called because")
+      else:
+        items.append(restPrefix + "|-True because")
+      items.append((reason, restPrefix + "| ", restPrefix + "| ", maxDepth))
+    return items
+
+#stands in for every justification that wasn't recorded (see Provenance)
+#It's shared, so it ignores attempts to change it
+class NullJustification(Justification):
+  __slots__ = ("description", "lineNumber")
+
+  def __init__(self, description="(not recorded)", lineNumber=None):
+    #doesn't call Justification.__init__, so that it isn't stored
+    self.justificationId = -1
+    self.supporters = noSupporters
+    self.cachedInterestingChildren = noSupporters
+    self.description = description
+    self.lineNumber = lineNumber
+
+  #always created, even while a Provenance is skipping new justifications
+  def __new__(justificationClass, *args):
+    return object.__new__(justificationClass)
+
+  def get_interesting(self):
+    return True
+
+  def set_interesting(self, interesting):
+    pass
+
+  interesting = property(get_interesting, set_interesting)
+
+  def get_locations(self):
+    return (None, self.lineNumber)
+
+  def set_locations(self, locations):
+    pass
+
+  locations = property(get_locations, set_locations)
+
+  def get_supporteeIds(self):
+    return None
+
+  def set_supporteeIds(self, supporteeIds):
+    pass
+
+  supporteeIds = property(get_supporteeIds, set_supporteeIds)
+
+  def addSupporters(self, supporters):
+    pass
+
+  def describe(self):
+    return self.description
+
+#stands in for an unselected justification (see ProvenanceSampler.collapse) and links to whichever of its supporters were recorded
+#It isn't interesting, so explanations show its recorded supporters in its place
+#It can be returned in place of several justifications, so like NullJustification, it ignores attempts to change its locations or whether it's interesting
+class CollapsedJustification(Justification):
+  __slots__ = ("fixedLocations",)
+
+  def __new__(justificationClass, *args):
+    return object.__new__(justificationClass)
+
+  def __init__(self, recordedSupporters):
+    logicLocation = None
+    for supporter in recordedSupporters:
+      if logicLocation is None:
+        logicLocation = supporter.locations[1]
+    self.fixedLocations = internLocations(externalStackInfo.get_leaf_relevantLineNumber(), logicLocation)
+    super(CollapsedJustification, self).__init__()
+    self.addSupporters(recordedSupporters)
+
+  def get_interesting(self):
+    return False
+
+  def set_interesting(self, interesting):
+    pass
+
+  interesting = property(get_interesting, set_interesting)
+
+  def get_locations(self):
+    return self.fixedLocations
+
+  def set_locations(self, locations):
+    pass
+
+  locations = property(get_locations, set_locations)
+
+  def describe(self):
+    return "[lines " + str(self.implementationLocation) + "/" + str(self.logicLocation) + "]: (details not recorded)"
+
+nullJustification = NullJustification()
 
 
 justification_endLine = externalStackInfo.get_root_relevantLineNumber()
@@ -970,6 +2799,8 @@ externalStackInfo.ignoreRange(justification_startLine, justification_endLine)
 
 #contains a value and a justification
 class JustifiedValue(object):
+  __slots__ = ("value", "justification")
+
   def __init__(self, value, justification):
     if value is not None and isinstance(value, JustifiedValue):
       logger.fail("JustifiedValue (" + str(value) + ") was given as the value of a JustifiedValue, which is unnecessary redundancy")
@@ -1005,14 +2836,23 @@ class ValueProvider(object):
   def getChildren(self):
     return []
 
+  def declareNames(self, names):
+    pass
+
+  def resolve(self, staticScope):
+    #see LogicStatement.resolve
+    for child in self.getChildren():
+      child.resolve(staticScope)
+
 #returns a constant
 class Const(ValueProvider):
   def __init__(self, value):
     super(Const, self).__init__()
     self.value = value
+    self.valueDescription = DeferredText("'%s' is in my program", value) #shared by the justifications of every evaluation
 
   def process(self, justification):
-    return JustifiedValue(self.value, TextJustification("'" + str(self.value) + "' is in my program"))
+    return JustifiedValue(self.value, TextJustification(self.valueDescription))
 
   def __str__(self):
     return str(self.value)
@@ -1022,20 +2862,29 @@ class Get(ValueProvider):
   def __init__(self, propertyName):
     super(Get, self).__init__()
     self.propertyName = propertyName
+    self.scopeDepth = None #how many scopes up the variable is declared, if known; decided by resolve
+
+  def resolve(self, staticScope):
+    self.scopeDepth = staticScope.findDepth(self.propertyName)
 
   def process(self, callJustification):
     if self.execution is None:
       logger.fail("execution is None for " + str(self), callJustification)
     scope = self.execution.getScope()
-    try:
-      info = scope.getInfo(self.propertyName)
-    except Exception as e:
-      logger.fail(str(self) + " failed", AndJustification(str(e), [callJustification]))
+    info = None
+    if self.scopeDepth is not None:
+      info = scope.tryGetInfoAt(self.scopeDepth, self.propertyName)
+    if info is None:
+      #the variable wasn't resolved, or its scope hasn't declared it yet, so search for it
+      try:
+        info = scope.getInfo(self.propertyName)
+      except Exception as e:
+        logger.fail(str(self) + " failed", AndJustification(str(e), [callJustification]))
     if not isinstance(info, JustifiedValue):
       raise Exception("Invalid value stored for variable " + str(self.propertyName) + "; required JustifiedValue, got " + str(info))
     storeJustification = info.justification
 
-    justification = FullJustification(str(self.propertyName), info.value, self.lineNumber, callJustification, [storeJustification])
+    justification = FullJustification(self.propertyName, info.value, self.lineNumber, callJustification, [storeJustification])
     return JustifiedValue(info.value, justification)
     #return JustifiedValue(info.value, AndJustification(str(self.propertyName) + " = " + str(info.value) + " (in " + str(scope) + ")", [callJustification, storeJustification]))
 
@@ -1077,7 +2926,14 @@ class JustificationGetter(ValueProvider):
     idInfo  = self.idProvider.process(callJustification)
     value = idInfo.value
     if value is not None:
-      justification = justificationsById[value.getNumber()]
+      justificationId = value.getNumber()
+      justification = justificationStore.get(justificationId)
+      if justification is None:
+        if justificationStore.isExpired(justificationId):
+          message = "statement #" + str(justificationId) + " has expired"
+        else:
+          message = "there is no statement #" + str(justificationId)
+        return JustifiedValue(None, AndJustification(message, [callJustification, idInfo.justification]))
       return JustifiedValue(justification, justification)
     else:
       return JustifiedValue(None, callJustification)
@@ -1141,14 +2997,12 @@ class Eq(ValueProvider):
     if value2 is not None and isinstance(value2, Object):
       logger.fail("Invalid value2 is instanceof Object (" + str(value2) + " of class " + str(value2.__class__) + ") provided to Eq. An Object should provide a proper 'equals' method to use instead", info2.justification)
     matches = (value1 == value2)
-    description = str(self.provider1)
     if matches:
-      description += " = "
+      description = DeferredText("%s = %s", self.provider1, self.provider2)
     else:
-      description += " != "
-    description += str(self.provider2)
-    justification1 = FullJustification(str(self.provider1), info1.value, self.lineNumber, callJustification, [info1.justification])
-    justification2 = FullJustification(str(self.provider2), info2.value, self.lineNumber, callJustification, [info2.justification])
+      description = DeferredText("%s != %s", self.provider1, self.provider2)
+    justification1 = FullJustification(self.provider1, info1.value, self.lineNumber, callJustification, [info1.justification])
+    justification2 = FullJustification(self.provider2, info2.value, self.lineNumber, callJustification, [info2.justification])
     justification = AndJustification(description, [justification1, justification2])
     justifiedValue = JustifiedValue(matches, justification)
     resultInfo = self.execution.getScope().newBoringObject("Bool", [justifiedValue], callJustification)
@@ -1173,9 +3027,7 @@ class Not(ValueProvider):
     resultValue = not subInfo.value.isTrue()
     resultInfo = self.execution.getScope().newBoringObject("Bool", [JustifiedValue(resultValue, subInfo.justification)], callJustification)
 
-    description = str(self) + " = " + str(resultValue)
-
-    justification = FullJustification(str(self), resultInfo.value, self.lineNumber, callJustification, [subInfo.justification])
+    justification = FullJustification(self, resultInfo.value, self.lineNumber, callJustification, [subInfo.justification])
     return JustifiedValue(resultInfo.value, justification)
 
   def getChildren(self):
@@ -1196,7 +3048,7 @@ class Or(ValueProvider):
     leftInfo = self.leftProvider.process(callJustification)
     rightInfo = self.rightProvider.process(callJustification)
     resultValue = leftInfo.value.isTrue() or rightInfo.value.isTrue()
-    resultInfo = self.execution.getScope().newBoringObject("Bool", [JustifiedValue(resultValue, AndJustification(str(self) + " = " + str(resultValue)
+    resultInfo = self.execution.getScope().newBoringObject("Bool", [JustifiedValue(resultValue, AndJustification(DeferredText("%s = %s", self, resultValue)
                                                            , [leftInfo.justification, rightInfo.justification]))], callJustification)
 
     return resultInfo
@@ -1219,9 +3071,7 @@ class IsNone(ValueProvider):
     resultValue = (subInfo.value is None)
     resultInfo = self.execution.getScope().newBoringObject("Bool", [JustifiedValue(resultValue, subInfo.justification)], callJustification)
 
-    description = str(self) + " = " + str(resultValue)
-
-    justification = FullJustification(str(self), resultInfo.value, self.lineNumber, callJustification, [subInfo.justification])
+    justification = FullJustification(self, resultInfo.value, self.lineNumber, callJustification, [subInfo.justification])
     return JustifiedValue(resultInfo.value, justification)
 
   def getChildren(self):
@@ -1280,7 +3130,7 @@ class PathJoin(ValueProvider):
     leftInfo = self.leftProvider.process(callJustification)
     rightInfo = self.rightProvider.process(callJustification)
     resultValue = os.path.join(leftInfo.value.getText(), rightInfo.value.getText())
-    justification = AndJustification(str(self) + " = " + str(resultValue), [leftInfo.justification, rightInfo.justification])
+    justification = AndJustification(DeferredText("%s = %s", self, resultValue), [leftInfo.justification, rightInfo.justification])
     resultInfo = self.execution.getScope().newBoringObject("String", [JustifiedValue(resultValue, justification)], callJustification)
     return resultInfo
 
@@ -1332,7 +3182,7 @@ class Plus(ValueProvider):
         logger.fail("Invalid return data type for " + str(sum) + " (not object)", sum.justification)
 
     justifications = [info.justification for info in infos]
-    justification = FullJustification(str(self), sum, self.lineNumber, callJustification, justifications)
+    justification = FullJustification(self, sum, self.lineNumber, callJustification, justifications)
     return JustifiedValue(sum.value, justification)
 
   def getChildren(self):
@@ -1359,6 +3209,7 @@ class WithId(ValueProvider):
 
   def process(self, callJustification):
     info = self.itemProvider.process(callJustification)
+    self.execution.noteShownJustification(info.justification)
     description = info.justification.getIdText() + str(info.value)
     return self.execution.getScope().newBoringObject("String", [JustifiedValue(description, info.justification)], callJustification)
 
@@ -1368,6 +3219,43 @@ class WithId(ValueProvider):
   def __str__(self):
     return "WithId(" + str(self.itemProvider) + ")"
 
+#describes how the method calls in this program have found their methods (see MethodCache)
+class MethodCacheStats(ValueProvider):
+  def __init__(self):
+    super(MethodCacheStats, self).__init__()
+
+  def process(self, callJustification):
+    description = self.execution.describeMethodCaches()
+    return self.execution.getScope().newBoringObject("String", [JustifiedValue(description, TextJustification("I counted my method calls"))], callJustification)
+
+  def __str__(self):
+    return "MethodCacheStats()"
+
+#does some of the work of a JustificationCollector (see JustificationCollector.step), so that a long-running program can forget what can no longer be asked about
+class CollectJustifications(LogicStatement):
+  def __init__(self, budget=20000):
+    super(CollectJustifications, self).__init__()
+    self.budget = budget
+
+  def process(self, justification):
+    self.execution.getJustificationCollector().step(self.budget)
+    return None
+
+  def __str__(self):
+    return "CollectJustifications(" + str(self.budget) + ")"
+
+#the most common description templates of the justifications in memory, and how much memory their descriptions take
+class DescriptionStats(ValueProvider):
+  def __init__(self):
+    super(DescriptionStats, self).__init__()
+
+  def process(self, callJustification):
+    description = justificationStore.describeDescriptionMemory() + "\n" + str(self.execution.getJustificationCollector())
+    return self.execution.getScope().newBoringObject("String", [JustifiedValue(description, TextJustification("I counted my justifications"))], callJustification)
+
+  def __str__(self):
+    return "DescriptionStats()"
+
 #############################################################################################################################################################################################
 #Some I/O
 
@@ -1412,7 +3300,8 @@ class FullExplain(Print):
 
   def process(self, justification):
     info = self.messageProvider.process(justification)
-    logger.message(info.justification.explainRecursive())
+    self.execution.noteShownJustification(info.justification)
+    logger.explain(info.justification)
     return info
 
   def __str__(self):
@@ -1427,12 +3316,33 @@ class ShortExplain(Print):
   def process(self, justification):
     info = self.messageProvider.process(justification)
     depthInfo = self.depthProvider.process(justification)
-    logger.message(info.justification.explainRecursive(depthInfo.value))
+    self.execution.noteShownJustification(info.justification)
+    logger.explain(info.justification, depthInfo.value)
     return info
 
   def __str__(self):
     return "ShortExplain(" + str(self.messageProvider) + ", " + str(self.depthProvider) + ")"
 
+#lists what a justification (from a JustificationGetter) influenced
+class ShortImpact(Print):
+  def __init__(self, messageProvider, depthProvider):
+    super(ShortImpact, self).__init__(messageProvider)
+    self.depthProvider = depthProvider
+
+  def process(self, justification):
+    info = self.messageProvider.process(justification)
+    depthInfo = self.depthProvider.process(justification)
+    if isinstance(info.value, Justification):
+      self.execution.noteShownJustification(info.value)
+      logger.explainImpact(info.value, depthInfo.value)
+    else:
+      #the justification couldn't be found, and info says why
+      logger.explain(info.justification, 0)
+    return info
+
+  def __str__(self):
+    return "ShortImpact(" + str(self.messageProvider) + ", " + str(self.depthProvider) + ")"
+
 #############################################################################################################################################################################################
 #Things pertaining to class definitions
     
@@ -1446,6 +3356,7 @@ class ClassDefinition(object):
     self.fieldTypes = fieldTypes
     self.implementedInScope = None
     self.methodDefiners = methodDefiners
+    self.canIntern = None #only native classes intern their values
 
   def newInstance(self, scope, justifiedArguments, callJustification):
     return scope.newManagedObject(self, justifiedArguments, callJustification)
@@ -1506,7 +3417,7 @@ class New(ValueProvider):
     callJustifications = [callJustification] + [item.justification for item in argumentInfos]
     numNonSelfParameters = len(callJustifications) - 1
 
-    text = "new " + str(self.className) + "(" + ", ".join([str(info.value) for info in argumentInfos]) + ")"
+    text = DeferredText("new %s(%s)", self.className, JoinedText(", ", argumentInfos))
     if self.execution is None:
       logger.fail("Invalid None execution on " + str(self) + " at " + str(self.lineNumber))
     result = self.execution.getScope().newObject(self.className, argumentInfos, AndJustification(text, callJustifications))
@@ -1547,12 +3458,11 @@ class Range(ValueProvider):
   def process(self, callJustification):
     lowInfo = self.lowProvider.process(callJustification)
     highInfo = self.highProvider.process(callJustification)
-    outputInfo = self.execution.getScope().newBoringObject("List", [], callJustification)
-    for item in range(lowInfo.value.getNumber(), highInfo.value.getNumber()):
-      newItem = self.execution.getScope().newBoringObject("Num", [JustifiedValue(item, UnknownJustification())], callJustification)
-      outputInfo.value.append(callJustification, newItem)
-    return JustifiedValue(outputInfo.value,
-             AndJustification(str(self) + " = (" + str(lowInfo.value.getNumber()) + "," + str(highInfo.value.getNumber()) + ")",
+    #the items are only created as they're used (see RangeWrapper), so a long loop doesn't need memory for all of them at once
+    rangeObject = RangeWrapper(callJustification, lowInfo.value.getNumber(), highInfo.value.getNumber())
+    self.execution.getScope().attachNativeObject("List", rangeObject)
+    return JustifiedValue(rangeObject,
+             AndJustification(DeferredText("%s = (%s,%s)", self, lowInfo.value.getNumber(), highInfo.value.getNumber()),
                [lowInfo.justification, highInfo.justification]))
   
   def __str__(self):
@@ -1572,7 +3482,7 @@ class DotSet(LogicStatement):
     owner = ownerInfo.value
     valueInfo = self.valueProvider.process(callJustification)
     value = valueInfo.value
-    justification = FullJustification(stringUtils.toGetterText(owner, self.propertyName), value, self.lineNumber, callJustification, [valueInfo.justification])
+    justification = FullJustification(GetterText(owner, self.propertyName), value, self.lineNumber, callJustification, [valueInfo.justification])
     owner.setInfo(self.propertyName, JustifiedValue(value, justification))
 
 #sets a property of self
@@ -1597,7 +3507,7 @@ class DotGet(ValueProvider):
       valueInfo = owner.getInfo(self.propertyName)
     except Exception as e:
       logger.fail("Failed to get " + str(self.propertyName) + ": " + str(e), callJustification)
-    description = stringUtils.toGetterText(owner, self.propertyName)
+    description = GetterText(owner, self.propertyName)
     justification = FullJustification(description, valueInfo.value, self.lineNumber, callJustification, [ownerInfo.justification, valueInfo.justification])
     return JustifiedValue(valueInfo.value, justification)
 
@@ -1630,7 +3540,7 @@ class SuperScope(DefinedInClass_Scope):
     super(SuperScope, self).__init__()
 
   def process(self, justification):
-    return JustifiedValue(self.classDefinitionScope.parent, TextJustification("parent scope of " + str(self.classDefinitionScope) + " is " + str(self.classDefinitionScope.parent)))
+    return JustifiedValue(self.classDefinitionScope.parent, TextJustification(internText("parent scope of " + str(self.classDefinitionScope) + " is " + str(self.classDefinitionScope.parent))))
 
   def __str__(self):
     return str(self.classDefinitionScope) + ".super"
@@ -1644,14 +3554,14 @@ class ClassFromObject_Scope(ValueProvider):
   def process(self, callJustification):
     objectInfo = self.objectProvider.process(callJustification)
     objectValue = objectInfo.value
-    justification = AndJustification("Check class of " + str(objectValue), [callJustification, EqualJustification("method owner", objectValue, objectInfo.justification)])
+    justification = AndJustification(DeferredText("Check class of %s", objectValue), [callJustification, EqualJustification("method owner", objectValue, objectInfo.justification)])
     try:
       classInfo = objectValue.getInfo("__class__")
     except Exception as e:
       logger.fail("class lookup of " + str(objectValue) + " failed", justification)
     classDefinition = classInfo.value
     classScope = classDefinition.implementedInScope
-    return JustifiedValue(classScope, TextJustification("(" + str(objectValue) + ") instanceof " + str(classDefinition)))
+    return JustifiedValue(classScope, TextJustification(DeferredText("(%s) instanceof %s", objectValue, classDefinition)))
 
   def getChildren(self):
     return [self.objectProvider]
@@ -1668,6 +3578,54 @@ class SelfScope(ClassFromObject_Scope):
     return "scope of self"
 
 #calls a particular method on a particular object
+#remembers which method a call site found for each class that it has been called on, so repeated calls can skip searching the class scopes
+#Holds up to maxNumClasses classes; a call site that sees more classes than that keeps the first ones and searches for the rest every time
+#Every cached method is forgotten when the Execution's methodCacheVersion changes, which happens whenever any function is declared or replaced
+class MethodCache(object):
+  maxNumClasses = 4
+
+  def __init__(self, execution):
+    self.execution = execution
+    self.version = execution.methodCacheVersion
+    self.classScopes = []
+    self.functions = []
+    self.numHits = 0
+    self.numMisses = 0
+    self.overflowed = False #whether this call site has seen more classes than it can remember
+
+  def getFunction(self, classScope, methodName, callJustification):
+    if self.version != self.execution.methodCacheVersion:
+      self.version = self.execution.methodCacheVersion
+      self.classScopes = []
+      self.functions = []
+      self.overflowed = False
+    index = 0
+    for cachedScope in self.classScopes:
+      if cachedScope is classScope:
+        self.numHits += 1
+        return self.functions[index]
+      index += 1
+    self.numMisses += 1
+    f = classScope.getFunction(methodName, callJustification)
+    if len(self.classScopes) < self.maxNumClasses:
+      self.classScopes.append(classScope)
+      self.functions.append(f)
+    else:
+      self.overflowed = True
+    return f
+
+  def getNumCalls(self):
+    return self.numHits + self.numMisses
+
+  def __str__(self):
+    if self.overflowed:
+      kind = "megamorphic"
+    elif len(self.classScopes) > 1:
+      kind = "polymorphic"
+    else:
+      kind = "monomorphic"
+    return str(self.numHits) + " hits, " + str(self.numMisses) + " misses, " + kind + " (" + ", ".join([str(classScope) for classScope in self.classScopes]) + ")"
+
 class DotCallImpl(LogicStatement):
   def __init__(self, classScope_provider, methodName, argumentProviders=[]):
     super(DotCallImpl, self).__init__()
@@ -1680,21 +3638,30 @@ class DotCallImpl(LogicStatement):
     self.argumentProviders = argumentProviders
     self.children.append(classScope_provider)
     self.children += argumentProviders
+    self.methodCache = None
+    self.lookupDescription = None #shared by the justifications of every call from here; made by beOwned, once the line number is final
+    self.evaluatedDescription = DeferredText("Evaluated %s", self)
+
+  def beOwned(self, execution):
+    super(DotCallImpl, self).beOwned(execution)
+    self.lookupDescription = DeferredText("[%s]: Calling %s", self.lineNumber, self)
+    if self.methodCache is None or self.methodCache.execution is not execution:
+      self.methodCache = MethodCache(execution)
+      execution.callSites.append(self)
 
   def process(self, callJustification):
-    classScope_info = self.classScope_provider.process(AndJustification("[" + str(self.lineNumber) + "]: Calling " + str(self), [callJustification]))
+    classScope_info = self.classScope_provider.process(AndJustification(self.lookupDescription, [callJustification]))
     classScope = classScope_info.value
     classScope_Justification = EqualJustification("self", classScope, classScope_info.justification)
     argumentInfos = [provider.process(callJustification) for provider in self.argumentProviders]
     argumentJustifications = [info.justification for info in argumentInfos[1:]]
     selfJustification = argumentInfos[0].justification
     numNonSelfParameters = len(argumentInfos) - 1
-    text = "Evaluated " + str(self)
-    contextJustification = AndJustification(text, [callJustification, selfJustification, classScope_Justification] + argumentJustifications)
+    contextJustification = AndJustification(self.evaluatedDescription, [callJustification, selfJustification, classScope_Justification] + argumentJustifications)
     contextJustification.logicLocation = self.lineNumber
-    f = classScope.getFunction(self.methodName, contextJustification)
+    f = self.methodCache.getFunction(classScope, self.methodName, contextJustification)
     result = self.execution.getScope().callFunction(f, argumentInfos, contextJustification)
-    justification = FullJustification(str(self), result.value, self.lineNumber, callJustification, [result.justification])
+    justification = FullJustification(self, result.value, self.lineNumber, callJustification, [result.justification])
     return JustifiedValue(result.value, justification)
 
   def __str__(self):
@@ -1762,14 +3729,15 @@ class NativeSelfCall(LogicStatement):
     selfJustification = managedObject_info.justification
     nativeObject = managedObject
     argumentInfos = [provider.process(callJustification) for provider in self.argumentProviders]
-    argsText = "(" + ", ".join([str(info.value) for info in argumentInfos]) + ")"
+    argumentsText = JoinedText(", ", argumentInfos)
+    argsText = DeferredText("(%s)", argumentsText)
     argumentsJustification = FullJustification(self.methodName + " arguments", argsText, self.lineNumber, callJustification, [info.justification for info in argumentInfos])
     allJustifications = [callJustification] + [info.justification for info in argumentInfos]
     try:
       nativeMethod = getattr(nativeObject, self.methodName)
     except Exception as e:
       logger.fail(str(self) + " failed", AndJustification(str(e), [callJustification, argumentsJustification]))
-    historyJustification = AndJustification("Called (unmanaged) " + str(managedObject) + "." + self.methodName + "(" + ", ".join([str(info.value) for info in argumentInfos]) + ")", [callJustification, selfJustification] + [argumentsJustification])
+    historyJustification = AndJustification(DeferredText("Called (unmanaged) %s.%s(%s)", managedObject, self.methodName, argumentsText), [callJustification, selfJustification] + [argumentsJustification])
     args = [historyJustification] + [info for info in argumentInfos]
     try:
       succeeded = False
@@ -1781,7 +3749,7 @@ class NativeSelfCall(LogicStatement):
     if result is None:
       result = JustifiedValue(None, UnknownJustification())
     historyJustification.interesting = False #we don't expect the user to be interested in knowing that we made an unmanaged call to implement their code, now that the call succeeded
-    justification = FullJustification("unmanaged " + str(managedObject) + "." + self.methodName + "(" + ", ".join([str(info.value) for info in argumentInfos]) + ")", result.value, self.lineNumber, callJustification, [result.justification])
+    justification = FullJustification(DeferredText("unmanaged %s.%s(%s)", managedObject, self.methodName, argumentsText), result.value, self.lineNumber, callJustification, [result.justification])
     justification.interesting = False #users probably don't care to to think about how many calls we made to implement their function call
     self.execution.getScope().declareInfo("return", JustifiedValue(result.value, justification))
     return result
@@ -1791,12 +3759,15 @@ class NativeSelfCall(LogicStatement):
 
 #the definition of a class that's implemented by a native class
 class NativeClassDefinition(object):
-  def __init__(self, managedClassName, constructor, methodDefinitions):
+  #canIntern, if given, tells whether a value passed to the constructor can share one immutable object with every other equal value (see Execution.tryGetInternedObject)
+  #parentClassName, if given, names another native class whose methods this one also has
+  def __init__(self, managedClassName, constructor, methodDefinitions, canIntern=None, parentClassName=None):
     self.managedClassName = managedClassName
     self.constructor = constructor
     self.methodDefinitions = methodDefinitions
+    self.canIntern = canIntern
     self.implementedInScope = None
-    self.parentClassName = None
+    self.parentClassName = parentClassName
     self.fieldTypes = {}
     self.implementedInScope = None
 
@@ -1817,6 +3788,7 @@ class NativeObject(Object):
     super(NativeObject, self).__init__(None)
     self.managedObject = self
     self.nativeObject = self
+    self.interned = False #whether this object is shared by every equal value (see Execution.tryGetInternedObject)
     
 class ListWrapper(NativeObject):
   def __init__(self, callJustification):
@@ -1830,16 +3802,22 @@ class ListWrapper(NativeObject):
   def append(self, callJustification, item):
     if not isinstance(item, JustifiedValue):
       logger.fail("Invalid item " + str(item) + " (not a subclass of JustifiedValue) appended to " + str(self), callJustification)
-    justification = AndJustification("appended " + str(item.value) + " to " + str(self.impl), [callJustification, item.justification])
+    justification = AndJustification(DeferredText("appended %s to %s", item.value, ListPrefixText(self.impl)), [callJustification, item.justification])
     justification.logicLocation = callJustification.logicLocation
     self.impl.append(JustifiedValue(item.value, justification))
     return JustifiedValue(None, callJustification)
 
+  def getItemInfo(self, index):
+    return self.impl[index]
+
+  def getNumItems(self):
+    return len(self.impl)
+
   def get(self, callJustification, indexInfo):
     index = indexInfo.value.getNumber()
-    itemInfo = self.impl[index]
+    itemInfo = self.getItemInfo(index)
     item = itemInfo.value
-    justification = AndJustification("returned " + str(self) + "[" + str(index) + "] = " + str(item), [itemInfo.justification, callJustification, indexInfo.justification])
+    justification = AndJustification(DeferredText("returned %s[%s] = %s", self, index, item), [itemInfo.justification, callJustification, indexInfo.justification])
     return JustifiedValue(item, justification)
 
   def tryGet(self, callJustification, indexInfo):
@@ -1847,22 +3825,26 @@ class ListWrapper(NativeObject):
     if index is None:
       itemJustification = TextJustification("index is None")
       item = None
-    elif index >= len(self.impl):
-      itemJustification = TextJustification("index (" + str(index) + ") is past the end of " + str(self) + " (" + str(len(self.impl)) + ")")
+    elif index >= self.getNumItems():
+      itemJustification = TextJustification("index (" + str(index) + ") is past the end of " + str(self) + " (" + str(self.getNumItems()) + ")")
       item = None
     else:
-      itemInfo = self.impl[index]
+      itemInfo = self.getItemInfo(index)
       item = itemInfo.value
       itemJustification = itemInfo.justification
-    justification = AndJustification("returned " + str(self) + "[" + str(index) + "] = " + str(item), [itemJustification, callJustification, indexInfo.justification])
+    justification = AndJustification(DeferredText("returned %s[%s] = %s", self, index, item), [itemJustification, callJustification, indexInfo.justification])
     return JustifiedValue(item, justification)
 
   def removeAt(self, callJustification, indexInfo):
-    del self.impl[indexInfo.value.getNumber()]
+    #make a new list rather than modifying the old one, which earlier descriptions may still be referring to
+    index = indexInfo.value.getNumber()
+    if index < 0:
+      index += len(self.impl)
+    self.impl = self.impl[:index] + self.impl[index + 1:]
 
   def getLength(self, callJustification):
     length = len(self.impl)
-    justification = AndJustification("these " + str(length) + " items were added to " + str(self), [info.justification for info in self.impl])
+    justification = AndJustification(DeferredText("these %s items were added to %s", length, self), [info.justification for info in self.impl])
     resultInfo = self.execution.getScope().newBoringObject("Num", [JustifiedValue(length, justification)], callJustification)
     return resultInfo
 
@@ -1873,7 +3855,7 @@ class ListWrapper(NativeObject):
     tostringInfos = []
     textObjects = []
     allJustifications = []
-    for info in self.impl:
+    for info in self.getItems():
       value = info.value
       allJustifications.append(info.justification)
       elementInfo = value.callMethodName("toString", [], callJustification)
@@ -1885,6 +3867,72 @@ class ListWrapper(NativeObject):
     resultInfo = self.managedObject.execution.getScope().newBoringObject("String", [JustifiedValue(result, elementsJustification)], callJustification)
     return resultInfo
 
+#a List of the integers from low (inclusive) to high (exclusive), as made by Range
+#Each item is only created when it is used, so iterating over a long range takes constant memory
+#Modifying a RangeWrapper first stores all of its items, after which it behaves like any other ListWrapper
+class RangeWrapper(ListWrapper):
+  def __init__(self, callJustification, low, high):
+    super(RangeWrapper, self).__init__(callJustification)
+    self.callJustification = callJustification
+    self.low = low
+    self.high = high
+    self.numberJustification = UnknownJustification()
+    self.lazy = True
+
+  def makeItem(self, number):
+    return self.execution.getScope().newBoringObject("Num", [JustifiedValue(number, self.numberJustification)], self.callJustification)
+
+  def iterateItems(self):
+    number = self.low
+    while number < self.high:
+      yield self.makeItem(number)
+      number += 1
+
+  def getItems(self):
+    if self.lazy:
+      return self.iterateItems()
+    return self.impl
+
+  def getItemInfo(self, index):
+    if not self.lazy:
+      return self.impl[index]
+    numItems = self.getNumItems()
+    if index < 0:
+      index += numItems
+    if index < 0 or index >= numItems:
+      raise IndexError("index " + str(index) + " out of range for " + str(self))
+    return self.makeItem(self.low + index)
+
+  def getNumItems(self):
+    if not self.lazy:
+      return len(self.impl)
+    return max(0, self.high - self.low)
+
+  def getLength(self, callJustification):
+    if not self.lazy:
+      return super(RangeWrapper, self).getLength(callJustification)
+    length = self.getNumItems()
+    justification = AndJustification(DeferredText("%s holds the %s numbers from %s to %s", self, length, self.low, self.high), [self.callJustification])
+    return self.execution.getScope().newBoringObject("Num", [JustifiedValue(length, justification)], callJustification)
+
+  #stores every item, so that the list can be modified
+  def materialize(self):
+    if self.lazy:
+      self.impl = [item for item in self.iterateItems()]
+      self.lazy = False
+
+  def append(self, callJustification, item):
+    self.materialize()
+    return super(RangeWrapper, self).append(callJustification, item)
+
+  def removeAt(self, callJustification, indexInfo):
+    self.materialize()
+    return super(RangeWrapper, self).removeAt(callJustification, indexInfo)
+
+  def clear(self, callJustification):
+    self.lazy = False
+    return super(RangeWrapper, self).clear(callJustification)
+
 class StringWrapper(NativeObject):
   def __init__(self, callJustification, textInfo):
     super(StringWrapper, self).__init__()
@@ -1902,7 +3950,7 @@ class StringWrapper(NativeObject):
     outputInfo = self.execution.getScope().newObject("List", [], callJustification)
     outputInfo.justification.interesting = False
     outputObject = outputInfo.value
-    justification = AndJustification(str(self) + ".split(" + str(separator) + ") = " + str(outputList), [callJustification, self.textInfo.justification, separatorInfo.justification])
+    justification = AndJustification(DeferredText("%s.split(%s) = %s", self, separator, outputList), [callJustification, self.textInfo.justification, separatorInfo.justification])
     for item in outputList:
       itemInfo = self.execution.getScope().newObject("String", [JustifiedValue(item, justification)], justification)
       itemInfo.justification.interesting = False
@@ -1917,7 +3965,7 @@ class StringWrapper(NativeObject):
       text = self.textInfo.value + otherString.textInfo.value
     except Exception as e:
       logger.fail("Failed to add '" + str(self) + "' and '" + str(other) + "'", AndJustification(str(e), [callJustification]))
-    justification = AndJustification("concatenation = " + str(text), [callJustification, self.textInfo.justification, otherString.textInfo.justification])
+    justification = AndJustification(DeferredText("concatenation = %s", text), [callJustification, self.textInfo.justification, otherString.textInfo.justification])
     resultInfo = self.managedObject.execution.getScope().newBoringObject("String", [JustifiedValue(text, justification)], callJustification)
     return resultInfo
 
@@ -1925,7 +3973,7 @@ class StringWrapper(NativeObject):
     inputValue = inputInfo.value.getText()
     outputValue = outputInfo.value.getText()
     resultValue = self.getText().replace(inputValue, outputValue)
-    justification = AndJustification('"' + str(self) + '".replace("' + str(inputValue) + "', '" + str(outputValue) + '" = "' + str(resultValue) + '"',
+    justification = AndJustification(DeferredText('"%s".replace("%s\', \'%s" = "%s"', self, inputValue, outputValue, resultValue),
                                      [callJustification, self.textInfo.justification, inputInfo.justification, outputInfo.justification])
     resultInfo = self.execution.getScope().newBoringObject("String", [JustifiedValue(resultValue, justification)], callJustification)
     return resultInfo
@@ -1942,7 +3990,7 @@ class StringWrapper(NativeObject):
       comparison = "=="
     else:
       comparison = "!="
-    justification = AndJustification(str(ourValue) + str(comparison) + str(theirValue), [self.textInfo.justification, other.textInfo.justification])
+    justification = AndJustification(DeferredText("%s%s%s", ourValue, comparison, theirValue), [self.textInfo.justification, other.textInfo.justification])
     return self.managedObject.execution.getScope().newObject("Bool", [JustifiedValue(result, justification)], callJustification)
 
   def exceptPrefix(self, callJustification, prefixInfo):
@@ -1963,13 +4011,64 @@ class StringWrapper(NativeObject):
   def __str__(self):
     return str(self.getText())
 
+#a String holding the output of a shell command, as made by Shell, which can also give what the command wrote to stderr
+class ShellOutputWrapper(StringWrapper):
+  def __init__(self, callJustification, textInfo, errorsInfo):
+    super(ShellOutputWrapper, self).__init__(callJustification, textInfo)
+    self.errorsInfo = errorsInfo
+
+  def getErrors(self, callJustification):
+    return self.execution.getScope().newBoringObject("String", [self.errorsInfo], callJustification)
+
+#the output of a shell command that may still be running, as made by AsyncShell
+#The command is only waited for when its output or errors are first used, so other statements can run meanwhile
+class PendingShellOutputWrapper(ShellOutputWrapper):
+  def __init__(self, callJustification, script, launchJustification):
+    #the text isn't known yet, so there is nothing for StringWrapper to check
+    super(StringWrapper, self).__init__()
+    self.script = script
+    self.launchJustification = launchJustification
+    self.resolvedTextInfo = None
+    self.resolvedErrorsInfo = None
+
+  def resolve(self):
+    if self.resolvedTextInfo is None:
+      self.script.wait()
+      self.resolvedTextInfo = JustifiedValue(str(self.script.output), self.script.justifyOutput([self.launchJustification]))
+      self.resolvedErrorsInfo = JustifiedValue(str(self.script.errors), self.script.justifyErrors([self.launchJustification]))
+
+  def get_textInfo(self):
+    self.resolve()
+    return self.resolvedTextInfo
+
+  def set_textInfo(self, textInfo):
+    self.resolvedTextInfo = textInfo
+
+  textInfo = property(get_textInfo, set_textInfo)
+
+  def get_errorsInfo(self):
+    self.resolve()
+    return self.resolvedErrorsInfo
+
+  def set_errorsInfo(self, errorsInfo):
+    self.resolvedErrorsInfo = errorsInfo
+
+  errorsInfo = property(get_errorsInfo, set_errorsInfo)
+
 class BoolWrapper(NativeObject):
   def __init__(self, callJustification, valueInfo):
     super(BoolWrapper, self).__init__()
     self.valueInfo = valueInfo
 
   def toString(self, callJustification):
-    return self.managedObject.execution.getScope().newObject("String", [JustifiedValue(str(self.valueInfo.value), self.valueInfo.justification)], callJustification)
+    return self.managedObject.execution.getScope().newObject("String", [JustifiedValue(str(self.valueInfo.value), self.getValueJustification(callJustification))], callJustification)
+
+  #returns the justification for this value, given the justification for how it was reached
+  #An interned Bool is shared by every equal value, so its own justification only says which value it is
+  def getValueJustification(self, referenceJustification):
+    if self.interned:
+      return referenceJustification
+    return self.valueInfo.justification
 
   def isTrue(self):
     if self.valueInfo.value == True:
@@ -1987,7 +4086,7 @@ class BoolWrapper(NativeObject):
       comparison = "=="
     else:
       comparison = "!="
-    justification = AndJustification(str(ourValue) + comparison + str(theirValue), [self.valueInfo.justification, other.valueInfo.justification])
+    justification = AndJustification(DeferredText("%s%s%s", ourValue, comparison, theirValue), [self.getValueJustification(callJustification), other.getValueJustification(otherInfo.justification)])
     resultInfo = self.managedObject.execution.getScope().newBoringObject("Bool", [JustifiedValue(result, justification)], callJustification)
     return resultInfo
 
@@ -2011,9 +4110,9 @@ class DictionaryWrapper(NativeObject):
   def get(self, callJustification, keyInfo):
     key = keyInfo.value.getText()
     if key not in self.items:
-      return JustifiedValue(None, AndJustification(str(key) + " not found in " + str(self), [callJustification]))
+      return JustifiedValue(None, AndJustification(DeferredText("%s not found in %s", key, self), [callJustification]))
     info = self.items.get(key)
-    return JustifiedValue(info.value, AndJustification(str(key) + " retrieved from " + str(self), [callJustification, info.justification]))
+    return JustifiedValue(info.value, AndJustification(DeferredText("%s retrieved from %s", key, self), [callJustification, info.justification]))
 
   def put(self, callJustification, keyInfo, valueInfo):
     try:
@@ -2021,7 +4120,7 @@ class DictionaryWrapper(NativeObject):
     except Exception as e:
       logger.fail(str(self) + " failed to get key text from " + str(keyInfo), AndJustification(str(e), [callJustification]))
     value = valueInfo.value
-    justification = AndJustification("called " + str(self) + "[" + str(key) + "] = " + str(value), [callJustification, keyInfo.justification, valueInfo.justification])
+    justification = AndJustification(DeferredText("called %s[%s] = %s", self, key, value), [callJustification, keyInfo.justification, valueInfo.justification])
     self.items[key] = JustifiedValue(value, justification)
     self.keyInfos[key] = keyInfo
     return None
@@ -2031,10 +4130,10 @@ class DictionaryWrapper(NativeObject):
     result = (key in self.items)
     supporters = [callJustification]
     if result:
-      explanationText = str(key) + " in " + str(self)
+      explanationText = DeferredText("%s in %s", key, self)
       supporters.append(self.items[key].justification)
     else:
-      explanationText = str(key) + " not in " + str(self)
+      explanationText = DeferredText("%s not in %s", key, self)
     justification = AndJustification(explanationText, supporters)
     resultInfo = self.execution.getScope().newBoringObject("Bool", [JustifiedValue(result, justification)], callJustification)
     return resultInfo
@@ -2049,25 +4148,31 @@ class NumberWrapper(NativeObject):
   def getNumber(self):
     return self.numberInfo.value
 
+  #see BoolWrapper.getValueJustification
+  def getValueJustification(self, referenceJustification):
+    if self.interned:
+      return referenceJustification
+    return self.numberInfo.justification
+
   def nonEmpty(self, callJustification):
     resultBool = (self.getNumber() is not None)
-    return self.managedObject.execution.getScope().newBoringObject("Bool", [JustifiedValue(resultBool, self.numberInfo.justification)], callJustification)
+    return self.managedObject.execution.getScope().newBoringObject("Bool", [JustifiedValue(resultBool, self.getValueJustification(callJustification))], callJustification)
 
   def equals(self, callJustification, otherInfo):
     other = otherInfo.value
     resultBool = self.getNumber() == other.getNumber()
-    justification = AndJustification(str(self.getNumber()) + " ?= " + str(other.getNumber()), [self.numberInfo.justification, otherInfo.justification])
+    justification = AndJustification(DeferredText("%s ?= %s", self.getNumber(), other.getNumber()), [self.getValueJustification(callJustification), otherInfo.justification])
     return self.managedObject.execution.getScope().newBoringObject("Bool", [JustifiedValue(resultBool, justification)], callJustification)
 
   def plus(self, callJustification, otherInfo):
     other = otherInfo.value
     resultNum = self.getNumber() + other.getNumber()
-    justification = AndJustification(str(self.getNumber()) + " + " + str(other.getNumber()) + " = " + str(resultNum), [self.numberInfo.justification, otherInfo.justification])
+    justification = AndJustification(DeferredText("%s + %s = %s", self.getNumber(), other.getNumber(), resultNum), [self.getValueJustification(callJustification), otherInfo.justification])
     return self.managedObject.execution.getScope().newBoringObject("Num", [JustifiedValue(resultNum,justification)], callJustification)
 
   def toString(self, callJustification):
     outputString = str(self.numberInfo.value)
-    return self.execution.getScope().newBoringObject("String", [JustifiedValue(outputString, self.numberInfo.justification)], callJustification)
+    return self.execution.getScope().newBoringObject("String", [JustifiedValue(outputString, self.getValueJustification(callJustification))], callJustification)
 
   def __str__(self):
     return str(self.numberInfo.value)
@@ -2093,20 +4198,41 @@ class AbstractException(InterpreterException):
 
 #############################################################################################################################################################################################
 #miscellaneous
+#runs a shell command and returns its output
+#If maxAge (in seconds) or inputFiles are given, the output is cached (see ShellResultCache) and reused until it is older than maxAge or until any of the inputFiles change
 class Shell(ValueProvider):
-  def __init__(self, commandText_provider):
+  def __init__(self, commandText_provider, maxAge=None, inputFiles=None, timeout=None):
     super(Shell, self).__init__()
     self.commandText_provider = commandText_provider
+    self.maxAge = maxAge
+    if inputFiles is None:
+      inputFiles = []
+    self.inputFiles = inputFiles
+    self.timeout = timeout #the number of seconds after which the command is stopped (see ShellScript)
 
   def process(self, callJustification):
     commandInfo = self.commandText_provider.process(callJustification)
     commandText = commandInfo.value.getText()
-    script = ShellScript(commandText)
+    cacheable = self.maxAge is not None or len(self.inputFiles) > 0
+    if cacheable:
+      shellResults = self.execution.shellResults
+      cachedResult = shellResults.get(commandText, self.maxAge, self.inputFiles)
+      if cachedResult is not None:
+        output = cachedResult.output
+        justification = AndJustification(DeferredText("shell command '%s' gave response = '%s' (cached result from #%s)", commandText, output, cachedResult.justification.justificationId),
+          [callJustification, cachedResult.justification])
+        return self.execution.getScope().newBoringObject("ShellOutput", [JustifiedValue(str(output), justification), cachedResult.errorsInfo], commandInfo.justification)
+      inputStats = getFileStats(self.inputFiles)
+    script = ShellScript(commandText, self.execution.getBashCoprocess(), self.timeout)
     script.process()
     output = script.output
-    justification = AndJustification(str("shell command '" + str(commandText) + "' gave response = '" + str(output) + "'"), [callJustification])
+    justification = script.justifyOutput([callJustification])
+    errorsInfo = JustifiedValue(str(script.errors), script.justifyErrors([callJustification]))
+    #a command that was stopped early might give a different result next time
+    if cacheable and not script.timedOut:
+      shellResults.put(commandText, CachedShellResult(output, script.returnCode, justification, errorsInfo, inputStats))
 
-    resultInfo = self.execution.getScope().newBoringObject("String", [JustifiedValue(str(output), justification)], commandInfo.justification)
+    resultInfo = self.execution.getScope().newBoringObject("ShellOutput", [JustifiedValue(str(output), justification), errorsInfo], commandInfo.justification)
     return resultInfo
 
   def getChildren(self):
@@ -2115,19 +4241,88 @@ class Shell(ValueProvider):
   def __str__(self):
     return "shell: " + str(self.commandText_provider)
 
+#starts a shell command and returns a String of its output without waiting for it (see PendingShellOutputWrapper)
+#Independent commands started this way run at the same time, and each is only waited for when its output is used
+class AsyncShell(ValueProvider):
+  def __init__(self, commandText_provider, timeout=None):
+    super(AsyncShell, self).__init__()
+    self.commandText_provider = commandText_provider
+    self.timeout = timeout #the number of seconds, counted from the launch, after which the command is stopped
+
+  def process(self, callJustification):
+    commandInfo = self.commandText_provider.process(callJustification)
+    commandText = commandInfo.value.getText()
+    script = ShellScript(commandText, None, self.timeout)
+    script.launch()
+    launchJustification = AndJustification(DeferredText("launched shell command '%s'", commandText), [callJustification, commandInfo.justification])
+    resultObject = PendingShellOutputWrapper(callJustification, script, launchJustification)
+    self.execution.getScope().attachNativeObject("ShellOutput", resultObject)
+    return JustifiedValue(resultObject, launchJustification)
+
+  def getChildren(self):
+    return [self.commandText_provider]
+
+  def __str__(self):
+    return "async shell: " + str(self.commandText_provider)
+
+#starts the given probes (a List of shell commands) in the background, in one pass of the ProbePool
+class StartProbes(ValueProvider):
+  def __init__(self, commandTexts_provider):
+    super(StartProbes, self).__init__()
+    self.commandTexts_provider = commandTexts_provider
+
+  def process(self, callJustification):
+    commandsInfo = self.commandTexts_provider.process(callJustification)
+    commandTexts = [info.value.getText() for info in commandsInfo.value.getItems()]
+    probePool = self.execution.getProbePool()
+    launchJustification = AndJustification(DeferredText("started probes %s, %s at a time, to finish within %s seconds", commandTexts, probePool.maxNumRunning, probePool.timeout),
+      [callJustification, commandsInfo.justification])
+    probePool.start(commandTexts, launchJustification)
+
+  def getChildren(self):
+    return [self.commandTexts_provider]
+
+  def __str__(self):
+    return "start probes: " + str(self.commandTexts_provider)
+
+#the output of a probe that was started by StartProbes, waiting for it if it is still running
+class ProbeResult(ValueProvider):
+  def __init__(self, commandText_provider):
+    super(ProbeResult, self).__init__()
+    self.commandText_provider = commandText_provider
+
+  def process(self, callJustification):
+    commandInfo = self.commandText_provider.process(callJustification)
+    commandText = commandInfo.value.getText()
+    probePool = self.execution.getProbePool()
+    if commandText not in probePool.scripts:
+      probePool.start([commandText], AndJustification(DeferredText("started probe '%s' when its result was needed", commandText), [callJustification]))
+    script = probePool.getScript(commandText)
+    supporters = [probePool.launchJustifications[commandText], callJustification]
+    outputInfo = JustifiedValue(str(script.output), script.justifyOutput(supporters))
+    errorsInfo = JustifiedValue(str(script.errors), script.justifyErrors(supporters))
+    return self.execution.getScope().newBoringObject("ShellOutput", [outputInfo, errorsInfo], commandInfo.justification)
+
+  def getChildren(self):
+    return [self.commandText_provider]
+
+  def __str__(self):
+    return "probe result: " + str(self.commandText_provider)
+
 def getModificationExpression():
-  return Shell(Str("stat --format %y whyBot.py  | grep -o 2016-10-05"))
+  return Shell(Str("stat --format %y whyBot.py  | grep -o 2016-10-05"), inputFiles=["whyBot.py"])
 
 def get_currentHash_expression():
-  return Shell(Str("head -n `wc -l whyBot.py | sed 's/ .*//'` whyBot.py  | md5sum | sed 's/^/#/'"))
+  return Shell(Str("head -n `wc -l whyBot.py | sed 's/ .*//'` whyBot.py  | md5sum | sed 's/^/#/'"), inputFiles=["whyBot.py"])
 
 def get_savedHash_expression():
-  return Shell(Str("tail -n 1 whyBot.py"))
+  return Shell(Str("tail -n 1 whyBot.py"), inputFiles=["whyBot.py"])
 
 def make_fileModified_expression():
   return Eq(get_savedHash_expression(), get_currentHash_expression())
 
-def suggestion():
+#the classes and the solver that suggestion talks to the user with
+def makeSuggestionProgram():
   program = Program()
   program.put([
     #for debugging
@@ -2226,7 +4421,7 @@ def suggestion():
          Return(Str("I can test the internet connection")),
       ])
       .func(Sig("execute"), [
-        If(DotCall(Str("ok"), "equals", [Shell(Str("curl -f google.com > /dev/null 2>&1 && echo -n ok"))])).then([
+        If(DotCall(Str("ok"), "equals", [Shell(Str("curl -f google.com > /dev/null 2>&1 && echo -n ok"), timeout=10)])).then([
           PrintWithId(Str("The internet connection seems fine to me")),
         ]).otherwise([
           PrintWithId(Str("Yeah, the internet connection does seem problematic")),
@@ -2234,21 +4429,49 @@ def suggestion():
       ]),
       
 
+    #the known facts, some of which are found by running the probes that Propositions declare
     Class("Universe")
-      .vars({"props":"Map<string,string>"})
+      .vars({"props":"Map<string,string>", "probes":"Map<string,string>", "pendingProbes":"List<String>"})
       .init([], [
         SelfSet("props", New("Dict")),
+        SelfSet("probes", New("Dict")),
+        SelfSet("pendingProbes", New("List")),
       ])
       .func(Sig("getProp", ["key"]), [
+        #a fact that has a probe is found from the probe's output the first time it is needed, unless the user already gave it
+        If(DotCall(SelfGet("probes"), "containsKey", [Get("key")])).then([
+          If(Not(DotCall(SelfGet("props"), "containsKey", [Get("key")]))).then([
+            SelfCall("putProp", [Get("key"), DotCall(ProbeResult(DotCall(SelfGet("probes"), "get", [Get("key")])), "equals", [Str("ok")])]),
+          ]),
+        ]),
         Return(DotCall(SelfGet("props"), "get", [Get("key")])),
       ])
       .func(Sig("putProp", ["key", "value"]), [
         DotCall(SelfGet("props"), "put", [Get("key"), Get("value")]),
+      ])
+      .func(Sig("addProbe", ["proposition"]), [
+        Var("probe", DotCall(Get("proposition"), "getProbe")),
+        Var("key", DotCall(Get("proposition"), "toString")),
+        If(Not(IsNone(Get("probe")))).then([
+          If(Not(DotCall(SelfGet("probes"), "containsKey", [Get("key")]))).then([
+            DotCall(SelfGet("probes"), "put", [Get("key"), Get("probe")]),
+            DotCall(SelfGet("pendingProbes"), "append", [Get("probe")]),
+          ]),
+        ]),
+      ])
+      #starts all of the probes added since the last time, without waiting for them
+      .func(Sig("gatherProbes"), [
+        StartProbes(SelfGet("pendingProbes")),
+        SelfSet("pendingProbes", New("List")),
       ]),
 
     Class("Proposition")
       .func(Sig("evaluate", ["universe"]), [
         AbstractException()
+      ])
+      #the shell command that tells whether this Proposition is True (by printing "ok"), or None
+      .func(Sig("getProbe"), [
+        Return(Const(None)),
       ]),
 
     #a Proposition without much logic - it just asks the Universe what its value is
@@ -2267,6 +4490,17 @@ def suggestion():
         Return(SelfGet("text"))
       ]),
 
+    #a TextProposition whose value the Universe can find by running a shell command
+    Class("ProbedProposition")
+      .inherit("TextProposition")
+      .vars({"probe": "String"})
+      .init(["text", "probe"], [
+        SelfSet("text", Get("text")),
+      ])
+      .func(Sig("getProbe"), [
+        Return(SelfGet("probe")),
+      ]),
+
     #a Proposition that says that two values are equal
     Class("EqualProposition")
       .inherit("Proposition")
@@ -2338,9 +4572,10 @@ def suggestion():
 
     #searches a list of solutions for a relevant solution
     Class("Solver")
-      .vars({"solutions":"Map<String, List<Solution>>"})
+      .vars({"solutions":"Map<String, List<Solution>>", "probedPropositions":"List<Proposition>"})
       .init([], [
         SelfSet("solutions", New("Dict")),
+        SelfSet("probedPropositions", New("List")),
       ])
       .func(Sig("addSolution", ["solution"]), [
         Var("key", DotCall(DotGet(Get("solution"), "problem"), "toString")),
@@ -2348,6 +4583,17 @@ def suggestion():
           DotCall(SelfGet("solutions"), "put", [Get("key"), New("List")]),
         ]),
         DotCall(DotCall(SelfGet("solutions"), "get", [Get("key")]) , "append", [Get("solution")]),
+        ForEach("prerequisite", DotGet(Get("solution"), "prerequisites"), [
+          If(Not(IsNone(DotCall(Get("prerequisite"), "getProbe")))).then([
+            DotCall(SelfGet("probedPropositions"), "append", [Get("prerequisite")]),
+          ]),
+        ]),
+      ])
+      #tells the universe about the probes of the prerequisites, so it can find their values
+      .func(Sig("declareProbes", ["universe"]), [
+        ForEach("proposition", SelfGet("probedPropositions"), [
+          DotCall(Get("universe"), "addProbe", [Get("proposition")]),
+        ]),
       ])
       .func(Sig("trySolve", ["problem", "universe"]), [
         Var("solutions", SelfCall("getDoableSolutions", [Get("problem"), Get("universe")])),
@@ -2402,7 +4648,7 @@ def suggestion():
       Var("doYouUnderstandTheSourceCode", New("TextProposition", [Str("I don't understand the code")])),
       Var("canYouFindAVersionThatWorks", New("TextProposition", [Str("I can't find a version of the software that works")])),
       Var("doYouHaveAnySourceCode", New("TextProposition", [Str("I don't have any code")])),
-      Var("doYouHaveInternet", New("TextProposition", [Str("I don't have internet access")])),
+      Var("doYouHaveInternet", New("ProbedProposition", [Str("I don't have internet access"), Str("curl -f google.com > /dev/null 2>&1 || echo -n ok")])),
       Var("canYouFindAnyLogs", New("TextProposition", [Str("I can't find any logs")])),
       Var("canYouAffordToWait", New("TextProposition", [Str("I can't afford to wait")])),
       Var("doYouHaveAnInstantMessenger", New("TextProposition", [Str("I don't have an instant messenger")])),
@@ -2737,17 +4983,23 @@ def suggestion():
     #talks to the user, answers "why", forwards requests onto the Solver
     Class("Communicator")
       .vars({"universe": "Universe",
-        "question":"CompositeQuestion"})
+        "question":"CompositeQuestion",
+        "modifiedProposition":"Proposition"})
       .init([], [
         SelfSet("universe", New("Universe")),
+        SelfSet("modifiedProposition", New("ProbedProposition", [Str("whyBot.py is modified"), Str("git status | grep modified | grep whyBot.py > /dev/null && echo -n ok")])),
+        #the probes all start now, and only the greeting waits (for the one it needs)
+        DotCall(SelfGet("universe"), "addProbe", [SelfGet("modifiedProposition")]),
+        DotCall(Get("solver"), "declareProbes", [SelfGet("universe")]),
+        DotCall(SelfGet("universe"), "gatherProbes"),
         SelfSet("question", New("CompositeQuestion")),
         SelfCall("greet"),
       ])
       .func(Sig("isModified"), [
-        Return(DotCall(Shell(Str("git status | grep modified | grep whyBot.py > /dev/null && echo -n ok")), "equals", [Str("ok")])),
+        Return(DotCall(SelfGet("modifiedProposition"), "evaluate", [SelfGet("universe")])),
       ])
       .func(Sig("displayGreetingLocatedInTopOfThisFile"), [
-        Print(DotCall(Shell(Str("head -n 6 whyBot.py | tail -n 5")), "replace", [Str("# "), Str("")])),
+        Print(DotCall(Shell(Str("head -n 6 whyBot.py | tail -n 5"), inputFiles=["whyBot.py"]), "replace", [Str("# "), Str("")])),
       ])
       .func(Sig("greet"), [
         If(SelfCall("isModified")).then([
@@ -2762,8 +5014,11 @@ def suggestion():
         solve            - Ask me to ask you what you would like solved.
         help   <keyword> - Ask me for usage of keyword <keyword> .
         y      <id>      - Ask me how I deduced statement number <id> .
+        impact <id>      - Ask me what statement number <id> influenced .
         clear            - Ask me to output lots of blank lines
         nvm              - Ask me to cancel the question that I'm asking
+        calls            - Ask me how my method calls found their methods
+        memory           - Ask me which descriptions my justifications use most
         """))
       ])
       .func(Sig("showJustificationHelp", []), [
@@ -2780,7 +5035,8 @@ def suggestion():
          Print(Str("- (#<whyId>) [lines <lineA>/<lineB>]: <text>\n")),
          Print(Str("See line number <lineA> in my source code for the corresponding low-level implementation")),
          Print(Str("See line number <lineB> in my source code for the corresponding high-level implementation")),
-         Print(Str("Type 'y <whyId>' for these statements too to list statements that support them\n")),
+         Print(Str("Type 'y <whyId>' for these statements too to list statements that support them")),
+         Print(Str("Type 'impact <whyId>' to list the statements that statement number <whyId> supports\n")),
       ])
       .func(Sig("showSolveHelp", []), [
          Print(Str("""
@@ -2927,6 +5183,23 @@ def suggestion():
           SelfCall("showJustificationHelp")
         ]),
       ])
+      .func(Sig("respondToImpact", ["idText"]), [
+        Var("justificationId", Int(Get("idText"))),
+        If(DotCall(Get("justificationId"), "nonEmpty")).then([
+          ShortImpact(JustificationGetter(Get("justificationId")), Const(1)),
+          Print(Str("")),
+        ]).otherwise([
+          SelfCall("showJustificationHelp")
+        ]),
+      ])
+      .func(Sig("respondToCalls", []), [
+        Print(MethodCacheStats()),
+        Print(Str("")),
+      ])
+      .func(Sig("respondToMemory", []), [
+        Print(DescriptionStats()),
+        Print(Str("")),
+      ])
       .func(Sig("respondToAnswer", ["answerText"]), [
         If(DotCall(SelfGet("question"), "isSatisfied")).then([
           Print(Str("I didn't ask you a question!")),
@@ -2952,22 +5225,34 @@ def suggestion():
         If(Or(DotCall(Str("y"), "equals", [Get("component0")]), DotCall(Str("why"), "equals", [Get("component0")]))).then([
           SelfCall("respondToWhy", [Get("argumentText")])
         ]).otherwise([
-         If(DotCall(Str("solve"), "equals", [Get("component0")])).then([
-            SelfCall("respondToSolve")
+          If(DotCall(Str("impact"), "equals", [Get("component0")])).then([
+            SelfCall("respondToImpact", [Get("argumentText")])
           ]).otherwise([
-            If(DotCall(Str("help"), "equals", [Get("component0")])).then([
-              SelfCall("respondToHelp", [Get("argumentText")]),
+            If(DotCall(Str("solve"), "equals", [Get("component0")])).then([
+              SelfCall("respondToSolve")
             ]).otherwise([
-              If(DotCall(Str("clear"), "equals", [Get("responseText")])).then([
-                SelfCall("respondToClear"),
+              If(DotCall(Str("help"), "equals", [Get("component0")])).then([
+                SelfCall("respondToHelp", [Get("argumentText")]),
               ]).otherwise([
-                If(DotCall(Str("nvm"), "equals", [Get("responseText")])).then([
-                  SelfCall("respondToNevermind"),
+                If(DotCall(Str("clear"), "equals", [Get("responseText")])).then([
+                  SelfCall("respondToClear"),
                 ]).otherwise([
-                  If(DotCall(SelfGet("question"), "recognizesAnswer", [Get("responseText")])).then([
-                    DotCall(SelfGet("question"), "answer", [Get("responseText")]),
+                  If(DotCall(Str("nvm"), "equals", [Get("responseText")])).then([
+                    SelfCall("respondToNevermind"),
                   ]).otherwise([
-                    Print(Str("""Sorry; I'm a robot, and English is only my second language. Type 'help' for help.""")),
+                    If(DotCall(Str("calls"), "equals", [Get("responseText")])).then([
+                      SelfCall("respondToCalls"),
+                    ]).otherwise([
+                      If(DotCall(Str("memory"), "equals", [Get("responseText")])).then([
+                        SelfCall("respondToMemory"),
+                      ]).otherwise([
+                        If(DotCall(SelfGet("question"), "recognizesAnswer", [Get("responseText")])).then([
+                          DotCall(SelfGet("question"), "answer", [Get("responseText")]),
+                        ]).otherwise([
+                          Print(Str("""Sorry; I'm a robot, and English is only my second language. Type 'help' for help.""")),
+                        ])
+                      ])
+                    ])
                   ])
                 ])
               ])
@@ -2993,9 +5278,15 @@ def suggestion():
         Print(Str("")),
         While(Bool(True), [
           SelfCall("talkOnce"),
+          CollectJustifications(),
         ]),
       ]),
+  ])
+  return program
 
+def suggestion():
+  program = makeSuggestionProgram()
+  program.put([
     Var("communicator", New("Communicator")),
     DotCall(Get("communicator"), "communicate"),
   ])
@@ -3039,6 +5330,31 @@ def inheritanceTest():
   program.run()
   return program
 
+#runs a small program without recording implementation lines, and checks that none of the justifications of its result has one
+def noLinesTest():
+  program = Program()
+  program.put([
+    Var("total", Num(0)),
+    For("i", Num(0), Num(3), [
+      Set("total", DotCall(Get("total"), "plus", [Get("i")])),
+    ]),
+    DotCall(Get("total"), "toString"),
+  ])
+  result = program.run(noLinesProvenance)
+  pending = [result.justification]
+  seenIds = set()
+  numLocated = 0
+  while len(pending) > 0:
+    justification = pending.pop()
+    if justification.justificationId in seenIds:
+      continue
+    seenIds.add(justification.justificationId)
+    if justification.implementationLocation is not None:
+      numLocated += 1
+    pending += justification.getSupporters()
+  logger.message(str(numLocated) + " of " + str(len(seenIds)) + " justifications recorded an implementation line, and line recording is enabled = " + str(externalStackInfo.enabled))
+  logger.message(result.justification.explainRecursive(2))
+
 def argTest():
   program = Program()
   program.put([
@@ -3062,13 +5378,420 @@ def printModified():
   else:
     logger.message("I think you have modified me. Here's why:")
   logger.message()
-  logger.message(info.justification.explainRecursive())
+  logger.explain(info.justification)
+
+#measures how much memory is used by a typical mix of justifications
+def justificationMemoryBenchmark(count=100000):
+  import resource
+  residentBefore = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  callJustification = TextJustification("benchmark started")
+  values = []
+  for i in range(count):
+    defaultJustification = TextJustification("the default variable value is None")
+    valueJustification = AndJustification("computed a value", [callJustification, defaultJustification])
+    values.append(JustifiedValue(i, FullJustification("x", i, 1, callJustification, [valueJustification])))
+  residentAfter = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  numJustifications = 3 * count
+
+  #the size of the objects themselves, not counting the shared descriptions, values and locations
+  numBytes = 0
+  for info in values:
+    justification = info.justification
+    for item in [info, justification, justification.supporters[1], justification.supporters[1].supporters[1]]:
+      numBytes += sys.getsizeof(item)
+      if hasattr(item, "__dict__"):
+        numBytes += sys.getsizeof(item.__dict__)
+      if isinstance(item, Justification) and item.supporters is not noSupporters:
+        numBytes += sys.getsizeof(item.supporters)
+  logger.message("Created " + str(numJustifications) + " justifications and " + str(count) + " justified values")
+  logger.message("Object size: " + str(numBytes / numJustifications) + " bytes per justification (including its share of the justified values)")
+  logger.message("Resident memory: " + str((residentAfter - residentBefore) * 1024 / numJustifications) + " bytes per justification")
+  logger.message(justificationStore)
+
+#measures how long a method call takes when it happens deep inside a chain of method calls
+def methodCallBenchmark(depth=20, numChains=50):
+  import time
+  program = Program()
+  program.put([
+    Class("Chain")
+      .func(Sig("descend", ["depth"]), [
+        If(Not(DotCall(Get("depth"), "equals", [Num(0)]))).then([
+          SelfCall("descend", [DotCall(Get("depth"), "plus", [Num(-1)])]),
+        ]),
+      ]),
+    Var("chain", New("Chain")),
+    For("i", Num(0), Num(numChains), [
+      DotCall(Get("chain"), "descend", [Num(depth)]),
+    ]),
+  ])
+  startTime = time.time()
+  program.run()
+  duration = time.time() - startTime
+  numCalls = numChains * (depth + 1)
+  logger.message(str(numCalls) + " calls to Chain.descend (" + str(numChains) + " chains of depth " + str(depth) + ") took " + str(round(duration, 3)) + "s")
+  logger.message(str(int(round(duration * 1000000 / numCalls))) + " microseconds per call")
+
+#counts the objects and justifications created per If(Eq(...)), with and without interned Bools and Nums
+#Each count is the difference between a loop whose body is an If(Eq(...)) and the same loop with an empty body
+def allocationBenchmark(numIterations=1000):
+  import time
+  global logger, nextObjectId
+  screenLogger = logger
+  def makeProgram(body):
+    program = Program()
+    program.put([
+      For("i", Num(0), Num(numIterations), body),
+    ])
+    return program
+  for internsValues in [False, True]:
+    counts = []
+    for body in [[], [If(Eq(Const(1), Const(1))).then([])]]:
+      Execution.internsValues = internsValues
+      program = makeProgram(body)
+      logger = RecordingLogger()
+      startObjectId = nextObjectId
+      startJustificationId = justificationStore.nextId
+      startTime = time.time()
+      program.run()
+      counts.append((nextObjectId - startObjectId, justificationStore.nextId - startJustificationId, time.time() - startTime))
+      logger = screenLogger
+    Execution.internsValues = True
+    numObjects = float(counts[1][0] - counts[0][0]) / numIterations
+    numJustifications = float(counts[1][1] - counts[0][1]) / numIterations
+    duration = (counts[1][2] - counts[0][2]) / numIterations
+    if internsValues:
+      description = "interned"
+    else:
+      description = "not interned"
+    logger.message("If(Eq(...)) with " + description + " values: " + str(numObjects) + " objects, " + str(numJustifications) + " justifications, " + str(int(round(duration * 1000000))) + " microseconds per iteration")
+
+#runs a program while journaling its justifications, and checks that the justifications read back from the journal explain the same as the ones in memory
+def journalTest(numIterations=300, capacity=2000, numSamples=50):
+  import tempfile
+  global logger, justificationStore
+  screenLogger = logger
+  path = os.path.join(tempfile.mkdtemp(), "justifications.journal")
+  justificationStore = JustificationStore(capacity)
+  justificationStore.startJournal(path)
+  firstId = justificationStore.nextId
+  logger = RecordingLogger()
+  program = makeLoopProgram(numIterations)
+  program.run()
+  logger = screenLogger
+  #justifications that are still in memory can be explained from memory, and evicted ones were written when they were evicted
+  heldIds = [justificationId for justificationId in range(firstId, justificationStore.nextId) if justificationStore.isHeld(justificationId)]
+  numCreated = justificationStore.nextId - firstId
+  numWrittenBeforeFlush = justificationStore.journal.getNumWritten()
+  justificationStore.flushJournal()
+  reader = JustificationJournal(path)
+  step = max(1, len(heldIds) // numSamples)
+  sampleIds = heldIds[::step]
+  numSame = 0
+  for justificationId in sampleIds:
+    expected = justificationStore.get(justificationId).explainRecursive()
+    actual = reader.get(justificationId).explainRecursive()
+    if expected == actual:
+      numSame += 1
+    else:
+      logger.message("Justification #" + str(justificationId) + " was explained differently from the journal:")
+      logger.message(expected)
+      logger.message(actual)
+  justificationStore.stopJournal()
+  logger.message(str(numWrittenBeforeFlush) + " of " + str(numCreated) + " justifications were written to the journal as they were evicted, and the rest when it was flushed")
+  logger.message(str(reader) + ", " + str(os.path.getsize(path)) + " bytes")
+  logger.message(str(numSame) + " of " + str(len(sampleIds)) + " justifications were explained the same from the journal as from memory")
+  reader.close()
+
+#runs a program and then collects the justifications that its variables no longer lead to
+def collectorTest(numIterations=2000):
+  global logger, justificationStore
+  screenLogger = logger
+  justificationStore = JustificationStore(justificationStore.capacity)
+  logger = RecordingLogger()
+  execution = Execution(makeLoopProgram(numIterations))
+  execution.run()
+  logger = screenLogger
+  collector = execution.getJustificationCollector()
+  numSteps = 1
+  while not collector.step():
+    numSteps += 1
+  logger.message(str(collector) + ", in " + str(numSteps) + " steps")
+  logger.message(justificationStore)
+  #everything that the remaining variable depends on should still be explainable
+  totalJustification = execution.rootScope.getInfo("total").justification
+  numLines = len(totalJustification.explainRecursive().split("\n"))
+  logger.message("the final total is still explained in " + str(numLines) + " lines")
+
+#exports the justifications of a program to a JustificationTable, and checks that the justifications read back from it explain the same as the ones in memory
+def exportTest(numIterations=2000, numSamples=50):
+  import tempfile
+  import time
+  global logger, justificationStore
+  screenLogger = logger
+  path = os.path.join(tempfile.mkdtemp(), "justifications.table")
+  justificationStore = JustificationStore(justificationStore.capacity)
+  logger = RecordingLogger()
+  makeLoopProgram(numIterations).run()
+  logger = screenLogger
+  startTime = time.time()
+  numWritten = justificationStore.export(path)
+  exportDuration = time.time() - startTime
+  startTime = time.time()
+  table = openJustificationTable(path)
+  loadDuration = time.time() - startTime
+  logger.message("exported " + str(numWritten) + " justifications (" + str(os.path.getsize(path)) + " bytes) in " + str(round(exportDuration, 3)) + "s, and loaded them in " + str(round(loadDuration, 3)) + "s")
+  sampleIds = range(0, justificationStore.nextId, max(1, justificationStore.nextId // numSamples))
+  numSame = 0
+  for justificationId in sampleIds:
+    expected = justificationStore.get(justificationId).explainRecursive(8)
+    actual = table.get(justificationId).explainRecursive(8)
+    if expected == actual:
+      numSame += 1
+    else:
+      logger.message("Justification #" + str(justificationId) + " was explained differently from the table:")
+      logger.message(expected)
+      logger.message(actual)
+  logger.message(str(numSame) + " of " + str(len(sampleIds)) + " justifications were explained the same from the table as from memory")
+  logger.message(table.summarize())
+
+#runs a trivial shell command many times, each time in a new bash and then in one BashCoprocess, and checks that a few unusual commands give the same results both ways
+def shellBenchmark(numCommands=1000):
+  coprocess = BashCoprocess()
+  for mode, scriptCoprocess in [("new bash per command", None), ("one bash coprocess", coprocess)]:
+    numExpected = 0
+    startTime = time.time()
+    for i in range(numCommands):
+      script = ShellScript("echo hi", scriptCoprocess)
+      script.process()
+      if script.output == "hi\n" and script.returnCode == 0:
+        numExpected += 1
+    duration = time.time() - startTime
+    logger.message(mode + ": " + str(numCommands) + " commands in " + str(round(duration, 3)) + "s (" + str(int(round(duration * 1000000 / numCommands))) + " microseconds per command), " + str(numExpected) + " gave the expected output")
+  #the last of these stops the coprocess, which should be restarted for the command after it
+  commandTexts = ["printf ok", "echo it\\'s; exit 3", "cd /; pwd", "X=1; echo $X", "echo $X", "echo oops >&2", "ls /nonexistent", "echo '(", "cat", "printf '\\n\\n'", "kill $$", "echo again"]
+  numSame = 0
+  for commandText in commandTexts:
+    results = []
+    for scriptCoprocess in [None, coprocess]:
+      script = ShellScript(commandText, scriptCoprocess)
+      script.process()
+      #bash names itself differently in the errors for a command that doesn't parse, so only whether there were errors is compared
+      results.append((script.output, script.returnCode, script.errors != ""))
+    if results[0] == results[1]:
+      numSame += 1
+    else:
+      logger.message("'" + commandText + "' gave " + repr(results[0]) + " in a new bash but " + repr(results[1]) + " in the coprocess")
+  logger.message(str(numSame) + " of " + str(len(commandTexts)) + " commands gave the same output and return code, and errors or not, both ways; " + str(coprocess))
+  coprocess.stop()
+
+#checks that shell commands are stopped after their timeout and that their output is truncated after maxNumBytes, both in a new bash and in a BashCoprocess
+def shellLimitsTest(timeout=0.5, maxNumBytes=1000):
+  coprocess = BashCoprocess()
+  results = []
+  for mode, scriptCoprocess in [("new bash per command", None), ("one bash coprocess", coprocess)]:
+    script = ShellScript("echo started; sleep 5; echo finished", scriptCoprocess, timeout)
+    startTime = time.time()
+    script.process()
+    logger.message(mode + ": a 5s command with a " + str(timeout) + "s timeout was stopped after " + str(round(time.time() - startTime, 2)) + "s, having given " + repr(script.output) + ", timedOut = " + str(script.timedOut))
+    script = ShellScript("seq 100000; echo oops >&2; exit 1", scriptCoprocess, None, maxNumBytes)
+    script.process()
+    logger.message(mode + ": kept " + str(len(script.output)) + " of " + str(script.outputSize) + " bytes of output, ending with " + repr(script.output[-14:]) + ", errors = " + repr(script.errors) + ", returnCode = " + str(script.returnCode))
+    results.append((script.output, script.outputSize, script.errors, script.returnCode))
+  coprocess.stop()
+  #the marker line that the coprocess prints after each command must not take the place of any of the output
+  if results[0] == results[1]:
+    logger.message("both modes kept the same " + str(len(results[0][0])) + " bytes of output")
+  else:
+    logger.message("The modes kept different output: " + repr(results[0]) + " and " + repr(results[1]))
+  #the timeout and the errors are part of the explanation
+  program = Program()
+  program.put([
+    Var("output", Shell(Str("echo started; echo oops >&2; sleep 5"), timeout=timeout)),
+    FullExplain(DotCall(Get("output"), "plus", [Str("")])),
+    FullExplain(DotCall(Get("output"), "getErrors", [])),
+  ])
+  program.run()
+
+#runs a few slow, independent shell commands with Shell and then with AsyncShell, and checks that both print the same but AsyncShell overlaps the commands
+def asyncShellBenchmark(numCommands=4, duration=0.25):
+  global logger
+  screenLogger = logger
+  outputs = []
+  for shellType in [Shell, AsyncShell]:
+    names = ["output" + str(i) for i in range(numCommands)]
+    program = Program()
+    program.put([Var(name, shellType(Str("sleep " + str(duration) + "; echo -n " + name))) for name in names])
+    program.put([Print(DotCall(Get(name), "plus", [Str("")])) for name in names])
+    logger = RecordingLogger()
+    startTime = time.time()
+    program.run()
+    totalDuration = time.time() - startTime
+    outputs.append(logger.messages)
+    logger = screenLogger
+    logger.message(shellType.__name__ + ": " + str(numCommands) + " commands of " + str(duration) + "s each took " + str(round(totalDuration, 3)) + "s")
+  if outputs[0] == outputs[1]:
+    logger.message("both printed the same " + str(len(outputs[0])) + " lines")
+  else:
+    logger.message("Shell printed " + str(outputs[0]) + " but AsyncShell printed " + str(outputs[1]))
+  #the output of an AsyncShell is explained by the command finishing, which is explained by it being launched
+  program = Program()
+  program.put([
+    Var("output", AsyncShell(Str("echo -n done"))),
+    FullExplain(DotCall(Get("output"), "plus", [Str("")])),
+  ])
+  program.run()
+
+#starts a fast probe, a slow one and one that is too slow in one pass, and checks that nothing waits for them until their results are used
+def probeTest(timeout=1.0):
+  global logger
+  commandTexts = ["echo -n ok", "sleep 0.5; echo -n ok", "sleep 5; echo -n ok"]
+  savedTimeout = ProbePool.timeout
+  ProbePool.timeout = timeout
+  startTime = time.time()
+  program = Program()
+  program.put([Var("probes", New("List"))])
+  program.put([DotCall(Get("probes"), "append", [Str(commandText)]) for commandText in commandTexts])
+  program.put([StartProbes(Get("probes")), Print(Str("started the probes"))])
+  for commandText in commandTexts:
+    program.put([Print(Concat([Str(commandText + ": "), DotCall(DotCall(ProbeResult(Str(commandText)), "equals", [Str("ok")]), "toString")]))])
+  program.put([ShortExplain(ProbeResult(Str(commandTexts[-1])), Const(1))])
+  execution = Execution(program)
+  #prints how long it had been since the start whenever the program prints something
+  screenLogger = logger
+  class TimingLogger(PrintLogger):
+    def message(self, item=""):
+      screenLogger.message("(" + str(round(time.time() - startTime, 2)) + "s) " + str(item))
+  logger = TimingLogger()
+  try:
+    execution.run()
+  finally:
+    logger = screenLogger
+    ProbePool.timeout = savedTimeout
+  logger.message(execution.getProbePool())
+
+#asks the Solver's Universe whether there's internet access, the way that Communicator asks whether whyBot.py is modified, and checks the answer against running curl directly
+def internetProbeTest():
+  global logger
+  program = makeSuggestionProgram()
+  program.put([
+    Var("universe", New("Universe")),
+    DotCall(Get("solver"), "declareProbes", [Get("universe")]),
+    DotCall(Get("universe"), "gatherProbes"),
+    Print(DotCall(DotCall(Get("universe"), "getProp", [Str("I don't have internet access")]), "toString")),
+  ])
+  screenLogger = logger
+  logger = RecordingLogger()
+  try:
+    program.run()
+    output = logger.messages
+  finally:
+    logger = screenLogger
+  expected = str(subprocess.call(["bash", "-c", "curl -f --max-time " + str(ProbePool.timeout) + " google.com > /dev/null 2>&1"]) != 0)
+  logger.message("the probe found that \"I don't have internet access\" is " + str(output[-1]) + ", and curl says that it is " + expected)
+
+#a program that spends nearly all of its time in a loop
+def makeLoopProgram(numIterations):
+  program = Program()
+  program.put([
+    Var("total", Num(0)),
+    For("i", Num(0), Num(numIterations), [
+      If(Not(IsNone(Get("i")))).then([
+        Set("total", DotCall(Get("total"), "plus", [Get("i")])),
+      ]),
+    ]),
+    Print(DotCall(Get("total"), "toString")),
+  ])
+  return program
+
+#nested loops whose bodies read and write variables from the enclosing scopes
+#The inner body declares a variable too, so each of its iterations still gets its own scope, and the outer variables are found by resolved depth
+def makeNestedLoopProgram(size):
+  program = Program()
+  program.put([
+    Var("total", Num(0)),
+    Var("last", Num(0)),
+    For("i", Num(0), Num(size), [
+      For("j", Num(0), Num(size), [
+        Var("sum", DotCall(Get("i"), "plus", [Get("j")])),
+        Set("total", DotCall(Get("total"), "plus", [Get("sum")])),
+      ]),
+      Set("last", Get("i")),
+    ]),
+    Print(DotCall(Get("total"), "toString")),
+  ])
+  return program
+
+#measures variable access in nested loops, and counts the scopes (and other objects) that the loops create
+def nestedLoopBenchmark(size=60, numTrials=4):
+  import gc
+  import time
+  global logger, justificationStore, nextObjectId
+  screenLogger = logger
+  durations = []
+  for trialIndex in range(numTrials):
+    program = makeNestedLoopProgram(size)
+    justificationStore = JustificationStore(justificationStore.capacity)
+    gc.collect()
+    logger = RecordingLogger()
+    startObjectId = nextObjectId
+    startTime = time.time()
+    program.run()
+    durations.append(time.time() - startTime)
+    numObjects = nextObjectId - startObjectId
+    logger = screenLogger
+  logger.message("nested loop of " + str(size) + "x" + str(size) + ": " + str(round(min(durations), 3)) + "s, created " + str(numObjects) + " objects")
+
+#runs the same program while recording each amount of provenance, and checks that it still prints the same thing
+def provenanceBenchmark(numIterations=2000, numTrials=3):
+  import gc
+  import time
+  global logger, justificationStore
+  screenLogger = logger
+  provenances = [fullProvenance, selectedProvenance(["total"]), sampledProvenance(10), topLevelProvenance, noProvenance]
+  expectedOutput = None
+  for provenance in provenances:
+    durations = []
+    for trialIndex in range(numTrials):
+      program = makeLoopProgram(numIterations)
+      justificationStore = JustificationStore(justificationStore.capacity)
+      gc.collect()
+      logger = RecordingLogger()
+      startTime = time.time()
+      program.run(provenance)
+      durations.append(time.time() - startTime)
+      output = logger.messages
+      numJustifications = justificationStore.nextId
+      logger = screenLogger
+    if expectedOutput is None:
+      expectedOutput = output
+    elif output != expectedOutput:
+      logger.message("With " + str(provenance) + ", printed " + str(output) + " instead of " + str(expectedOutput))
+    duration = min(durations)
+    logger.message("loop of " + str(numIterations) + " with " + str(provenance) + ": " + str(round(duration, 3)) + "s (" + str(int(numIterations / duration)) + " iterations per second), recorded " + str(numJustifications) + " justifications")
 
 def main():
+  #"--journal <path>" writes this session's justifications to a JustificationJournal at that path, so that they can still be explained after it exits
+  arguments = sys.argv[1:]
+  if len(arguments) == 2 and arguments[0] == "--journal":
+    justificationStore.startJournal(arguments[1])
   #printModified()
   #equalityCheck()
   suggestion()
   #inheritanceTest()
+  #noLinesTest()
+  #justificationMemoryBenchmark()
+  #methodCallBenchmark()
+  #nestedLoopBenchmark()
+  #allocationBenchmark()
+  #journalTest()
+  #provenanceBenchmark()
+  #collectorTest()
+  #exportTest()
+  #shellBenchmark()
+  #shellLimitsTest()
+  #asyncShellBenchmark()
+  #probeTest()
+  #internetProbeTest()
 
 main()
 #abbdf4f9d3a6cbd25076cd554f102355 *-
\ No newline at end of file